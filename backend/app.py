@@ -4,7 +4,7 @@ BetGPT Backend API Server
 Serves market analysis, predictions, and portfolio data
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from data_ingestion import DataIngestion
 from prediction_model import PredictionModel
@@ -14,10 +14,24 @@ from simulated_portfolio import SimulatedPortfolio
 from backtesting import BacktestingEngine
 from arbitrage_detector import ArbitrageDetector
 from inefficiency_tracker import InefficiencyTracker
+from refresh_scheduler import RefreshScheduler
+from enrichment_engine import EnrichmentEngine
+from market_table import (
+    MarketTable, RAW_FLOAT_COLUMNS, ENRICHED_FLOAT_COLUMNS,
+    ENRICHED_INT_COLUMNS, ENRICHED_STRING_COLUMNS
+)
+from ranking_index import RankingIndex
+from keyword_classifier import keyword_classifier
+from response_cache import SerializedResponse, SnapshotBundle
+from market_query import MarketQueryIndex, QUERY_PARAMS, StaleCursorError
+from delta_stream import DeltaLog, diff_arbitrage, diff_markets, format_event
+from snapshot_store import SnapshotStore
+import numpy as np
+import os
 import time
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['ETag', 'X-Snapshot-Version', 'X-Snapshot-Age', 'X-Snapshot-Stale', 'X-Refreshing'])
 
 # Initialize components
 data_ingestion = DataIngestion()
@@ -28,189 +42,547 @@ portfolio = SimulatedPortfolio()
 backtester = BacktestingEngine()
 arbitrage_detector = ArbitrageDetector()
 inefficiency_tracker = InefficiencyTracker()
+enrichment_engine = EnrichmentEngine(max_workers=int(os.getenv('ENRICHMENT_WORKERS', '16')))
+# Optional on-disk history of every snapshot (also used for warm restarts)
+snapshot_store = SnapshotStore(os.getenv('SNAPSHOT_STORE_PATH')) if os.getenv('SNAPSHOT_STORE_PATH') else None
 
 # Cache for processed markets
 markets_cache = {
-    'data': [],
-    'timestamp': 0
+    'data': MarketTable(),
+    'timestamp': 0,
+    'version': 0,  # Incremented on every successful refresh
+    'analytics': None,
+    'arbitrage': None,
+    'responses': {},  # Endpoint name -> SerializedResponse for this snapshot
+    'query': None,  # MarketQueryIndex for filtered/paginated /api/markets
+    'seq': 0,  # Last delta_log sequence number this snapshot includes
+    'portfolio': None,  # Portfolio and backtest state as of this refresh
+    'backtest': None,
+    'bundle': None  # SnapshotBundle served by /api/snapshot
 }
 
 CACHE_DURATION = 60  # Refresh every 60 seconds
+COLD_START_TIMEOUT = 120  # Longest a request waits for the very first refresh
+FULL_CATALOG_SCAN = os.getenv('FULL_CATALOG_SCAN', '').lower() in ('1', 'true', 'yes')
+STREAM_HEARTBEAT = 15  # Seconds between keep-alive comments on idle streams
+INCREMENTAL_REFRESH = os.getenv('INCREMENTAL_REFRESH', '1').lower() in ('1', 'true', 'yes')
+
+# Previous refresh's table and its market key -> row, for reusing enrichment
+previous_table = MarketTable()
+previous_rows = {}
+
+# Markets ranked by inefficiency score, updated incrementally across refreshes
+market_ranking = RankingIndex()
+
 portfolio_initialized = False
 backtest_initialized = False
 
+def reuse_enrichment(table, keys):
+    """
+    Copy enrichment from the previous refresh into rows whose inputs are unchanged
+    A row is unchanged when its market key is known and market_prob, liquidity
+    and volume all match. Returns (reused rows, rows that still need enrichment)
+    """
+    if not len(previous_table):
+        return np.array([], dtype=np.intp), np.arange(len(table))
+    
+    previous = np.array([previous_rows.get(key, -1) for key in keys], dtype=np.intp)
+    unchanged = previous >= 0
+    safe_previous = np.where(unchanged, previous, 0)
+    for name in RAW_FLOAT_COLUMNS:
+        unchanged &= previous_table.column(name)[safe_previous] == table.column(name)
+    
+    reused = np.flatnonzero(unchanged)
+    source_rows = previous[reused]
+    for name in ENRICHED_FLOAT_COLUMNS + ENRICHED_INT_COLUMNS:
+        table.column(name)[reused] = previous_table.column(name)[source_rows]
+    for name in ENRICHED_STRING_COLUMNS:
+        column = previous_table.column(name)
+        table.set_column(name, [column[j] for j in source_rows.tolist()], rows=reused.tolist())
+    
+    return reused, np.flatnonzero(~unchanged)
+
+def enrich_rows(table, rows):
+    """
+    Predict, score and recommend the given rows of a table in place
+    Signals are gathered concurrently; combining, scoring and recommending run
+    as whole columns. Returns the rows that were enriched successfully
+    """
+    markets = [table.raw_market(i) for i in rows]
+    signals = enrichment_engine.map(prediction_model.gather_signals, markets)
+    gathered = [k for k, market_signals in enumerate(signals) if market_signals is not None]
+    if not gathered:
+        return np.array([], dtype=np.intp)
+    
+    rows = np.asarray([rows[k] for k in gathered], dtype=np.intp)
+    predictions = prediction_model.estimate_probabilities(
+        [markets[k] for k in gathered], [signals[k] for k in gathered]
+    )
+    
+    market_probs = table.column('market_prob')[rows]
+    ai_probs = np.array([p['ai_probability'] for p in predictions])
+    
+    # Calculate inefficiency
+    scores = scoring_engine.calculate_inefficiency_batch(market_probs, ai_probs, table.column('liquidity')[rows])
+    
+    row_positions = rows.tolist()
+    table.set_column('ai_probability', ai_probs, rows)
+    table.set_column('inefficiency_score', scores, rows)
+    for name in ('news_sentiment', 'crypto_sentiment', 'political_sentiment', 'weather_sentiment'):
+        table.set_column(name, [p[name] for p in predictions], rows)
+    table.set_column('reasoning', [p['reasoning'] for p in predictions], row_positions)
+    table.set_column('score_label', scoring_engine.get_score_label_batch(scores).tolist(), row_positions)
+    table.set_column('score_color', scoring_engine.get_score_color_batch(market_probs, ai_probs).tolist(), row_positions)
+    
+    # Generate recommendations
+    recommendations = recommendation_engine.generate_recommendation_batch(market_probs, ai_probs, scores)
+    for name, column in recommendations.items():
+        if name in ENRICHED_STRING_COLUMNS:
+            table.set_column(name, column.tolist(), row_positions)
+        else:
+            table.set_column(name, column, rows)
+    
+    return rows
+
 def process_markets():
     """Fetch and process all markets with AI analysis"""
-    global portfolio_initialized, backtest_initialized
+    global portfolio_initialized, backtest_initialized, previous_table, previous_rows
     
     print("🔄 Fetching markets...")
-    raw_markets = data_ingestion.fetch_all_markets()
-    
-    if not raw_markets:
-        print("⚠️ No markets fetched, using cached data")
-        return markets_cache.get('data', [])
+    if FULL_CATALOG_SCAN:
+        # Stream every open market page by page; scoring starts on the first page
+        market_pages = data_ingestion.iter_all_market_pages()
+    else:
+        market_pages = [data_ingestion.fetch_all_markets()]
     
-    processed_markets = []
+    page_tables = []
+    reused_count = 0
+    ranking_updates = []  # (key, score) of freshly enriched rows; reused rows keep their ranked score
     
-    for market in raw_markets:
+    for page in market_pages:
         try:
-            # Get AI prediction
-            prediction = prediction_model.estimate_probability(market)
-            ai_prob = prediction['ai_probability']
-            
-            # Calculate inefficiency
-            inefficiency_score = scoring_engine.calculate_inefficiency(market, ai_prob)
-            score_label = scoring_engine.get_score_label(inefficiency_score)
-            score_color = scoring_engine.get_score_color(market['market_prob'], ai_prob)
-            
-            # Generate recommendation
-            recommendation = recommendation_engine.generate_recommendation(
-                market, ai_prob, inefficiency_score
-            )
-            
-            # Combine all data
-            processed_market = {
-                **market,
-                'ai_probability': ai_prob,
-                'inefficiency_score': inefficiency_score,
-                'score_label': score_label,
-                'score_color': score_color,
-                'recommendation': recommendation,
-                'reasoning': prediction['reasoning'],
-                'news_sentiment': prediction['news_sentiment']
-            }
-            
-            processed_markets.append(processed_market)
+            table = MarketTable.from_markets(page)
         except Exception as e:
-            print(f"Error processing market: {e}")
+            print(f"Error processing market page: {e}")
             continue
+        
+        # Only new or changed markets go through the expensive path
+        if INCREMENTAL_REFRESH:
+            reused, changed = reuse_enrichment(table, table.keys())
+        else:
+            reused, changed = np.array([], dtype=np.intp), np.arange(len(table))
+        enriched = enrich_rows(table, changed.tolist())
+        
+        page_keys = table.keys()
+        ranking_updates.extend(zip(
+            [page_keys[row] for row in enriched.tolist()],
+            table.column('inefficiency_score')[enriched].tolist()
+        ))
+        reused_count += len(reused)
+        page_tables.append(table.take(np.sort(np.concatenate([reused, enriched]))))
     
-    # Sort by inefficiency score (highest first)
-    processed_markets.sort(key=lambda x: x['inefficiency_score'], reverse=True)
+    markets = MarketTable.concat(page_tables)
+    if not len(markets):
+        print("⚠️ No markets fetched, keeping last good snapshot")
+        return None
+    
+    print(f"♻️ Reused enrichment for {reused_count}/{len(markets)} unchanged markets")
+    
+    # Update the ranking incrementally: only re-enriched markets move, departed markets drop out
+    keys = markets.keys()
+    rows_by_key = {key: row for row, key in enumerate(keys)}
+    market_ranking.update_many(ranking_updates)
+    market_ranking.retain(rows_by_key)
+    
+    # Snapshot rows in ranking order (highest inefficiency first)
+    markets = markets.take([rows_by_key[key] for key in market_ranking.keys()])
+    
+    previous_table = markets
+    previous_rows = {key: row for row, key in enumerate(markets.keys())}
     
     # Initialize portfolio with first batch (only once for historical trades)
-    if processed_markets and not portfolio_initialized:
-        portfolio.create_simulated_trades(processed_markets, threshold=0.10)
+    if not portfolio_initialized:
+        top_markets = [previous_rows[key] for key, _ in market_ranking.top_k(10)]
+        portfolio.create_simulated_trades(markets.to_dicts(top_markets), threshold=0.10)
         portfolio_initialized = True
         print("✅ Portfolio initialized with simulated trades")
     else:
         # AGENTIC LOOP: Continuously scan for new opportunities and trade
         # This runs every time we fetch fresh markets (every 60 seconds)
-        if processed_markets:
-            new_opportunities = [m for m in processed_markets if m['inefficiency_score'] >= 0.12]
-            if new_opportunities:
-                new_trades_count = portfolio.add_live_trades(new_opportunities[:3])  # Top 3 opportunities
-                if new_trades_count > 0:
-                    print(f"🤖 AI Agent created {new_trades_count} new trades based on inefficiencies")
+        new_opportunities = [previous_rows[key] for key, _ in market_ranking.at_least(0.12, limit=3)]  # Top 3 opportunities
+        if new_opportunities:
+            new_trades_count = portfolio.add_live_trades(markets.to_dicts(new_opportunities))
+            if new_trades_count > 0:
+                print(f"🤖 AI Agent created {new_trades_count} new trades based on inefficiencies")
     
     # Run backtest (only once)
-    if processed_markets and not backtest_initialized:
+    if not backtest_initialized:
         print("🔬 Running backtest simulation...")
-        backtester.run_backtest(processed_markets, days=30)
+        eligible = [previous_rows[key] for key, _ in market_ranking.at_least(0.08)]
+        eligible_markets = markets.to_dicts(eligible)
+        backtester.run_backtest(eligible_markets, days=30)
+        backtester.run_monte_carlo(eligible_markets, days=30, paths=10000)
         backtest_initialized = True
         print("✅ Backtest complete - 30 days simulated")
     
-    print(f"✅ Processed {len(processed_markets)} markets")
-    return processed_markets
+    print(f"✅ Processed {len(markets)} markets")
+    return markets
 
-@app.route('/api/markets', methods=['GET'])
-def get_markets():
-    """Get all processed markets with AI analysis"""
-    current_time = time.time()
+def build_analytics_view(markets, timestamp=None):
+    """Aggregate analytics for one snapshot of processed markets"""
+    scores = markets.column('inefficiency_score')
     
-    # Use cache if fresh
-    if current_time - markets_cache['timestamp'] < CACHE_DURATION and markets_cache['data']:
-        return jsonify({
+    # Record current snapshot for history
+    inefficiency_tracker.record_snapshot(scores, timestamp)
+    
+    # Last 24 hours of recorded history, at a resolution that keeps the chart small
+    history = inefficiency_tracker.get_history(hours=24)
+    
+    # Category analysis
+    category_names = []
+    category_ids = []
+    for title, key in zip(markets.column('title'), markets.keys()):
+        # Keyword categorization, memoized per market by the shared classifier
+        category = keyword_classifier.category(title, key)
+        
+        if category not in category_names:
+            category_names.append(category)
+        category_ids.append(category_names.index(category))
+    
+    # Calculate averages as column reductions
+    category_ids = np.asarray(category_ids, dtype=np.intp)
+    counts = np.bincount(category_ids, minlength=len(category_names))
+    sums = np.bincount(category_ids, weights=scores, minlength=len(category_names))
+    
+    category_analytics = []
+    for i, cat in enumerate(category_names):
+        category_analytics.append({
+            'category': cat,
+            'avg_inefficiency': round(float(sums[i] / counts[i]), 3),
+            'count': int(counts[i])
+        })
+    
+    category_analytics.sort(key=lambda x: x['avg_inefficiency'], reverse=True)
+    
+    return {
+        'categories': category_analytics,
+        'overall_avg_inefficiency': round(float(scores.mean()), 3),
+        'total_markets': len(markets),
+        'inefficiency_history': history
+    }
+
+def build_arbitrage_view(markets):
+    """Cross-market arbitrage opportunities for one snapshot"""
+    opportunities = arbitrage_detector.find_arbitrage_opportunities(markets)
+    return {
+        'opportunities': opportunities,
+        'summary': arbitrage_detector.get_arbitrage_summary(opportunities)
+    }
+
+def build_view(name, builder, markets):
+    """Materialize one derived view; a failing view must not block the snapshot"""
+    try:
+        return builder(markets)
+    except Exception as e:
+        print(f"Error building {name} view: {e}")
+        return None
+
+def build_responses(snapshot, market_dicts):
+    """Serialize and compress each endpoint's body once per snapshot"""
+    payloads = {
+        'markets': {
             'success': True,
-            'markets': markets_cache['data'],
+            'markets': market_dicts,
             'cached': True,
-            'count': len(markets_cache['data']),
-            'last_update': markets_cache['timestamp']
-        })
+            'count': len(snapshot['data']),
+            'version': snapshot['version'],
+            'last_update': snapshot['timestamp']
+        }
+    }
+    for name in ('analytics', 'arbitrage'):
+        if snapshot[name] is not None:
+            payloads[name] = {
+                'success': True,
+                **snapshot[name],
+                'version': snapshot['version'],
+                'timestamp': snapshot['timestamp']
+            }
+    
+    responses = {}
+    for name, payload in payloads.items():
+        try:
+            responses[name] = SerializedResponse(payload)
+        except Exception as e:
+            print(f"Error serializing {name} response: {e}")
+    return responses
+
+def build_bundle(snapshot, market_dicts):
+    """Sections for /api/snapshot, all from this refresh generation"""
+    return SnapshotBundle({
+        'markets': market_dicts,
+        'analytics': snapshot['analytics'],
+        'portfolio': snapshot['portfolio'],
+        'arbitrage': snapshot['arbitrage'],
+        'backtest': snapshot['backtest']
+    }, snapshot['version'], snapshot['timestamp'])
+
+def snapshot_headers(snapshot):
+    """Per-request freshness details, kept out of the body so its bytes and ETag stay fixed"""
+    age = time.time() - snapshot['timestamp']
+    return {
+        'X-Snapshot-Version': snapshot['version'],
+        'X-Snapshot-Age': round(age, 1),
+        'X-Snapshot-Stale': 'true' if age >= CACHE_DURATION else 'false',
+        'X-Refreshing': 'true' if refresh_scheduler.is_refreshing() else 'false'
+    }
+
+def publish_deltas(previous, snapshot, trade_ids):
+    """Append what this refresh changed to the delta log served by /api/stream"""
+    if not previous['data']:
+        return  # Nothing to diff against; streams start from the full snapshot
     
-    # Fetch fresh data
+    version = snapshot['version']
     try:
-        markets = process_markets()
-        if markets:
-            markets_cache['data'] = markets
-            markets_cache['timestamp'] = current_time
+        market_delta = diff_markets(previous['data'], snapshot['data'])
+        if market_delta['changed'] or market_delta['added'] or market_delta['removed']:
+            delta_log.append('markets', {'version': version, **market_delta})
         
-        return jsonify({
-            'success': True,
-            'markets': markets_cache['data'],
-            'cached': False,
-            'count': len(markets_cache['data']),
-            'last_update': current_time
-        })
+        arbitrage_delta = diff_arbitrage(previous['arbitrage'], snapshot['arbitrage'])
+        if arbitrage_delta['added'] or arbitrage_delta['removed']:
+            delta_log.append('arbitrage', {'version': version, **arbitrage_delta})
+        
+        new_trades = [t for t in portfolio.get_all_trades() if t.get('is_live') and t['id'] not in trade_ids]
+        if new_trades:
+            delta_log.append('trades', {'version': version, 'trades': new_trades})
+        
+        delta_log.append('refresh', {'version': version, 'timestamp': snapshot['timestamp'], 'count': len(snapshot['data'])})
     except Exception as e:
-        print(f"Error in get_markets: {e}")
-        return jsonify({
-            'success': False,
-            'error': str(e),
-            'markets': markets_cache.get('data', [])
-        }), 500
+        # A partial delta would leave clients out of sync; make them resync from a snapshot
+        print(f"Error publishing deltas: {e}")
+        delta_log.reset()
 
-@app.route('/api/analytics', methods=['GET'])
-def get_analytics():
-    """Get aggregate analytics"""
-    if not markets_cache['data']:
-        return jsonify({'success': False, 'error': 'No data available'})
+def build_snapshot(markets, timestamp, version):
+    """A complete snapshot: the table plus every view and serialized response derived from it"""
+    # Derived views are computed once per refresh so requests are plain reads
+    snapshot = {
+        'data': markets,
+        'timestamp': timestamp,
+        'version': version,
+        'analytics': build_view('analytics', lambda table: build_analytics_view(table, timestamp), markets),
+        'arbitrage': build_view('arbitrage', build_arbitrage_view, markets),
+        # Captured now so a bundle never mixes generations
+        'portfolio': {'stats': portfolio.get_portfolio_stats(), 'trades': list(portfolio.get_all_trades())},
+        'backtest': backtester.get_results()
+    }
+    market_dicts = markets.to_dicts()
+    snapshot['responses'] = build_responses(snapshot, market_dicts)
+    snapshot['bundle'] = build_view('bundle', lambda table: build_bundle(snapshot, market_dicts), markets)
+    snapshot['query'] = build_view(
+        'query',
+        lambda table: MarketQueryIndex(table, snapshot['version'], snapshot['timestamp']),
+        markets
+    )
+    snapshot['seq'] = delta_log.last_seq
+    return snapshot
+
+def refresh_markets():
+    """Rebuild the market snapshot; the cache is swapped only on success"""
+    global markets_cache
     
-    markets = markets_cache['data']
+    previous = markets_cache
+    trade_ids = {trade['id'] for trade in portfolio.get_all_trades()}
+    markets = process_markets()
+    if markets is not None:
+        snapshot = build_snapshot(markets, time.time(), previous['version'] + 1)
+        publish_deltas(previous, snapshot, trade_ids)
+        snapshot['seq'] = delta_log.last_seq
+        # Replace the whole snapshot at once so readers never see a half-updated cache
+        markets_cache = snapshot
+        
+        if snapshot_store is not None:
+            try:
+                snapshot_store.append(markets, snapshot['timestamp'])
+            except Exception as e:
+                print(f"Error saving snapshot to store: {e}")
     
-    # Record current snapshot for history
-    inefficiency_tracker.record_snapshot(markets)
+    prediction_model.save_caches()
+
+def backfill_history(until, days=14):
+    """Replay stored per-snapshot inefficiency into the tracker (everything before `until`)"""
+    rows = snapshot_store.read_range(until - days * 86400, until, fields=('timestamp', 'inefficiency_score'))
+    timestamps = rows['timestamp']
+    if not len(timestamps):
+        return
     
-    # Get inefficiency history (generate mock for demo)
-    history = inefficiency_tracker.generate_mock_history(markets, hours=24)
+    # Rows of one snapshot share a timestamp: aggregate each run with reduceat
+    scores = np.asarray(rows['inefficiency_score'])
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(timestamps)) + 1])
+    counts = np.diff(np.append(starts, len(timestamps)))
+    averages = np.add.reduceat(scores, starts) / counts
+    high_counts = np.add.reduceat((scores >= 0.15).astype(np.int64), starts)
+    for timestamp, average, count, high in zip(timestamps[starts].tolist(), averages.tolist(), counts.tolist(), high_counts.tolist()):
+        inefficiency_tracker.record(timestamp, average, count, high)
+    print(f"♻️ Backfilled {len(starts)} inefficiency history points from the snapshot store")
+
+def restore_snapshot():
+    """
+    Warm restart: serve the newest stored snapshot until the first refresh replaces it
+    The restored table also seeds incremental refresh, so unchanged markets aren't re-enriched
+    """
+    global markets_cache, previous_table, previous_rows
     
-    # Category analysis
-    categories = {}
-    for market in markets:
-        # Simple categorization based on keywords
-        title_lower = market['title'].lower()
-        if any(word in title_lower for word in ['trump', 'election', 'president', 'political', 'senate', 'congress']):
-            category = 'Politics'
-        elif any(word in title_lower for word in ['bitcoin', 'crypto', 'eth', 'btc', 'cryptocurrency']):
-            category = 'Crypto'
-        elif any(word in title_lower for word in ['nba', 'nfl', 'sports', 'game', 'championship']):
-            category = 'Sports'
-        elif any(word in title_lower for word in ['weather', 'rain', 'temperature', 'snow']):
-            category = 'Weather'
-        elif any(word in title_lower for word in ['market', 'stock', 'economy', 'gdp', 'inflation']):
-            category = 'Economy'
-        else:
-            category = 'Other'
-        
-        if category not in categories:
-            categories[category] = {'scores': [], 'count': 0}
+    if snapshot_store is None:
+        return
+    try:
+        latest = snapshot_store.latest_snapshot()
+        if latest is None:
+            return
+        timestamp, markets = latest
+        backfill_history(timestamp)
+        markets_cache = build_snapshot(markets, timestamp, markets_cache['version'] + 1)
         
-        categories[category]['scores'].append(market['inefficiency_score'])
-        categories[category]['count'] += 1
+        keys = markets.keys()
+        market_ranking.update_many(zip(keys, markets.column('inefficiency_score').tolist()))
+        previous_table = markets
+        # Rows stored before reasoning or every signal was recorded come back incomplete, so they are re-enriched
+        complete = np.array([bool(reasoning) for reasoning in markets.column('reasoning')], dtype=bool)
+        for name in ('crypto_sentiment', 'political_sentiment', 'weather_sentiment'):
+            complete &= ~np.isnan(markets.column(name))
+        previous_rows = {key: row for row, key in enumerate(keys) if complete[row]}
+        print(f"♻️ Restored {len(markets)} markets from the snapshot store")
+    except Exception as e:
+        print(f"Error restoring snapshot from store: {e}")
+
+refresh_scheduler = RefreshScheduler(refresh_markets, interval=CACHE_DURATION)
+delta_log = DeltaLog()
+restore_snapshot()
+
+def current_snapshot():
+    """The snapshot to serve: joins the first refresh on a cold start, revalidates stale data in the background"""
+    refresh_scheduler.start()
+    snapshot = markets_cache
     
-    # Calculate averages
-    category_analytics = []
-    for cat, data in categories.items():
-        avg_inefficiency = sum(data['scores']) / len(data['scores'])
-        category_analytics.append({
-            'category': cat,
-            'avg_inefficiency': round(avg_inefficiency, 3),
-            'count': data['count']
-        })
+    if not snapshot['data']:
+        # Cold start: nothing to serve yet, so join the first refresh
+        refresh_scheduler.trigger(wait=True, timeout=COLD_START_TIMEOUT)
+        snapshot = markets_cache
+    elif time.time() - snapshot['timestamp'] >= CACHE_DURATION:
+        # Serve the last good snapshot and revalidate in the background
+        refresh_scheduler.trigger()
     
-    category_analytics.sort(key=lambda x: x['avg_inefficiency'], reverse=True)
+    return snapshot
+
+@app.route('/api/markets', methods=['GET'])
+def get_markets():
+    """
+    Get processed markets with AI analysis
+    Optional query params: source, category, action (comma-separated), min_inefficiency,
+    sort, order, page/page_size or cursor; without any, the full snapshot is served
+    """
+    snapshot = current_snapshot()
+    if not snapshot['data']:
+        return jsonify({
+            'success': False,
+            'error': refresh_scheduler.last_error or 'No data available yet',
+            'markets': [],
+            'refreshing': refresh_scheduler.is_refreshing()
+        }), 503
     
-    # Overall stats
-    all_scores = [m['inefficiency_score'] for m in markets]
+    if any(name in request.args for name in QUERY_PARAMS):
+        if snapshot['query'] is None:
+            return jsonify({'success': False, 'error': 'Market query index unavailable'}), 500
+        try:
+            response = snapshot['query'].response(request.args)
+        except StaleCursorError as e:
+            # The rows were reordered by a refresh, so the client has to start paging again
+            return jsonify({'success': False, 'error': str(e), 'version': snapshot['version']}), 410
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return response.to_response(snapshot_headers(snapshot))
     
-    return jsonify({
-        'success': True,
-        'categories': category_analytics,
-        'overall_avg_inefficiency': round(sum(all_scores) / len(all_scores), 3),
-        'total_markets': len(markets),
-        'inefficiency_history': history,
-        'timestamp': time.time()
-    })
+    if 'markets' not in snapshot['responses']:
+        return jsonify({'success': False, 'error': 'Market response unavailable'}), 500
+    
+    return snapshot['responses']['markets'].to_response(snapshot_headers(snapshot))
+
+@app.route('/api/snapshot', methods=['GET'])
+def get_snapshot():
+    """
+    Markets, analytics, portfolio, arbitrage and backtest from one refresh generation
+    Optional ?fields=markets,analytics limits the bundle to the listed sections
+    """
+    snapshot = current_snapshot()
+    if not snapshot['data'] or snapshot['bundle'] is None:
+        return jsonify({
+            'success': False,
+            'error': refresh_scheduler.last_error or 'No data available yet',
+            'refreshing': refresh_scheduler.is_refreshing()
+        }), 503
+    
+    fields = request.args.get('fields')
+    if fields is not None:
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+    try:
+        response = snapshot['bundle'].response(fields)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return response.to_response(snapshot_headers(snapshot))
+
+@app.route('/api/stream', methods=['GET'])
+def stream_markets():
+    """
+    Server-Sent Events: one full snapshot, then only what each refresh changed
+    Resume with ?since=<seq> or the Last-Event-ID header; if that point is no longer
+    buffered the stream starts over with a fresh snapshot
+    """
+    refresh_scheduler.start()
+    since = request.args.get('since') or request.headers.get('Last-Event-ID')
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since must be an integer'}), 400
+    
+    def events(since):
+        while True:
+            if since is not None:
+                pending = delta_log.wait(since, timeout=STREAM_HEARTBEAT)
+                if pending is None:
+                    since = None  # Fell out of the buffer: resync from a snapshot
+                elif pending:
+                    for seq, event, data in pending:
+                        yield format_event(seq, event, data)
+                    since = pending[-1][0]
+                else:
+                    yield ": heartbeat\n\n"
+                continue
+            
+            snapshot = markets_cache
+            if 'markets' not in snapshot['responses']:
+                refresh_scheduler.trigger(wait=True, timeout=STREAM_HEARTBEAT)
+                yield ": waiting for first snapshot\n\n"
+                continue
+            
+            # Stitch the pre-serialized bodies together rather than re-encoding them
+            data = '{"markets":' + snapshot['responses']['markets'].body.decode('utf-8')
+            if 'arbitrage' in snapshot['responses']:
+                data += ',"arbitrage":' + snapshot['responses']['arbitrage'].body.decode('utf-8')
+            yield format_event(snapshot['seq'], 'snapshot', data + '}')
+            since = snapshot['seq']
+    
+    return Response(
+        stream_with_context(events(since)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    """Get aggregate analytics"""
+    snapshot = markets_cache
+    if not snapshot['data'] or 'analytics' not in snapshot['responses']:
+        return jsonify({'success': False, 'error': 'No data available'})
+    
+    return snapshot['responses']['analytics'].to_response(snapshot_headers(snapshot))
 
 @app.route('/api/portfolio', methods=['GET'])
 def get_portfolio():
@@ -235,26 +607,11 @@ def get_portfolio():
 @app.route('/api/arbitrage', methods=['GET'])
 def get_arbitrage():
     """Get cross-market arbitrage opportunities"""
-    if not markets_cache['data']:
+    snapshot = markets_cache
+    if not snapshot['data'] or 'arbitrage' not in snapshot['responses']:
         return jsonify({'success': False, 'error': 'No data available'})
     
-    try:
-        markets = markets_cache['data']
-        opportunities = arbitrage_detector.find_arbitrage_opportunities(markets)
-        summary = arbitrage_detector.get_arbitrage_summary(opportunities)
-        
-        return jsonify({
-            'success': True,
-            'opportunities': opportunities,
-            'summary': summary,
-            'timestamp': time.time()
-        })
-    except Exception as e:
-        print(f"Error in get_arbitrage: {e}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return snapshot['responses']['arbitrage'].to_response(snapshot_headers(snapshot))
 
 @app.route('/api/backtest', methods=['GET'])
 def get_backtest():
@@ -279,7 +636,11 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': time.time(),
-        'markets_cached': len(markets_cache.get('data', [])),
+        'markets_cached': len(markets_cache['data']),
+        'last_update': markets_cache['timestamp'],
+        'refreshing': refresh_scheduler.is_refreshing(),
+        'last_refresh_error': refresh_scheduler.last_error,
+        'caches': prediction_model.cache_stats(),
         'portfolio_initialized': portfolio_initialized
     })
 
@@ -293,5 +654,11 @@ if __name__ == '__main__':
     print("   GET /api/portfolio - Simulated portfolio & trades")
     print("   GET /api/backtest - Historical backtest results")
     print("   GET /api/arbitrage - Cross-market arbitrage opportunities")
+    print("   GET /api/snapshot - All dashboard views from one refresh (?fields=...)")
+    print("   GET /api/stream - Live market deltas (Server-Sent Events)")
     print("   GET /api/health - Health check")
+    
+    # Keep the market snapshot warm; under the debug reloader only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        refresh_scheduler.start()
     app.run(debug=True, host='0.0.0.0', port=5001)
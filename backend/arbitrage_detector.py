@@ -1,11 +1,25 @@
 from difflib import SequenceMatcher
+from market_table import MarketTable
+from ranking_index import RankingIndex
+import threading
 
 class ArbitrageDetector:
     """Detects cross-market arbitrage opportunities"""
     
     def __init__(self):
         self.similarity_threshold = 0.75  # 75% similarity to consider same market
+        self.min_token_length = 3  # Shorter tokens are too common to block on
+        self.max_token_postings = 200  # Skip tokens shared by more markets than this
         
+        # State kept across refreshes, keyed by (source, market id)
+        self._titles = {}  # key -> (title, normalized title, tokens)
+        self._poly_index = {}  # token -> Polymarket keys
+        self._manifold_index = {}  # token -> Manifold keys
+        self._matched_pairs = {}  # (poly key, manifold key) -> similarity
+        self._pairs_by_market = {}  # key -> pairs involving that market
+        self._spread_ranking = RankingIndex()  # Pairs with a significant spread, widest first
+        self._lock = threading.Lock()
+    
     def calculate_similarity(self, text1, text2):
         """Calculate text similarity between two market titles"""
         return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
@@ -19,77 +33,213 @@ class ArbitrageDetector:
             title_lower = title_lower.replace(word, '')
         return ' '.join(title_lower.split())
     
-    def find_arbitrage_opportunities(self, markets):
+    def tokenize(self, normalized_title):
+        """Split a normalized title into blocking tokens"""
+        return {token for token in normalized_title.split() if len(token) >= self.min_token_length}
+    
+    def _index_add(self, index, key, tokens):
+        """Add a market key to an inverted index under each of its tokens"""
+        for token in tokens:
+            index.setdefault(token, set()).add(key)
+    
+    def _index_remove(self, index, key, tokens):
+        """Remove a market key from an inverted index"""
+        for token in tokens:
+            keys = index.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[token]
+    
+    def candidate_keys(self, tokens, index):
+        """
+        Keys of indexed titles sharing at least one informative token
+        Very common tokens are skipped, unless the title has nothing rarer
+        """
+        postings = [index[token] for token in tokens if token in index]
+        if not postings:
+            return set()
+        
+        informative = [p for p in postings if len(p) <= self.max_token_postings]
+        if not informative:
+            informative = [min(postings, key=len)]
+        
+        candidates = set()
+        for keys in informative:
+            candidates.update(keys)
+        return candidates
+    
+    def _forget_market(self, key):
+        """Drop a market from the title cache, its index and any matched pairs"""
+        _, _, tokens = self._titles.pop(key)
+        index = self._poly_index if key[0] == 'Polymarket' else self._manifold_index
+        self._index_remove(index, key, tokens)
+        for pair in self._pairs_by_market.pop(key, set()):
+            self._matched_pairs.pop(pair, None)
+            self._spread_ranking.remove(pair)
+            other = pair[1] if pair[0] == key else pair[0]
+            other_pairs = self._pairs_by_market.get(other)
+            if other_pairs is not None:
+                other_pairs.discard(pair)
+    
+    def _match(self, matcher, poly_key, manifold_key):
+        """Exact similarity check for one candidate pair; records it if it matches"""
+        matcher.set_seq1(self._titles[poly_key][1])
+        
+        # Cheap upper bounds first, exact ratio only for plausible pairs
+        if matcher.real_quick_ratio() < self.similarity_threshold:
+            return
+        if matcher.quick_ratio() < self.similarity_threshold:
+            return
+        similarity = matcher.ratio()
+        
+        if similarity >= self.similarity_threshold:
+            pair = (poly_key, manifold_key)
+            self._matched_pairs[pair] = similarity
+            self._pairs_by_market.setdefault(poly_key, set()).add(pair)
+            self._pairs_by_market.setdefault(manifold_key, set()).add(pair)
+    
+    def update_matches(self, markets):
+        """
+        Bring the pair cache up to date with the current market table
+        Only markets that are new (or whose title changed) are normalized and
+        matched; markets that left the feed are forgotten along with their pairs
+        Returns the current key -> row mapping
+        """
+        titles = markets.column('title')
+        current = {}
+        for row, key in enumerate(markets.keys()):
+            if key[0] in ('Polymarket', 'Manifold'):
+                current[key] = row
+        
+        for key in list(self._titles):
+            if key not in current or self._titles[key][0] != titles[current[key]]:
+                self._forget_market(key)
+        
+        new_poly, new_manifold = [], []
+        for key, row in current.items():
+            if key in self._titles:
+                continue
+            title_norm = self.normalize_title(titles[row])
+            self._titles[key] = (titles[row], title_norm, self.tokenize(title_norm))
+            (new_poly if key[0] == 'Polymarket' else new_manifold).append(key)
+        
+        # New Polymarket markets join the index first so new Manifold markets see them
+        for key in new_poly:
+            self._index_add(self._poly_index, key, self._titles[key][2])
+        
+        # SequenceMatcher caches analysis of its second sequence, so hold the
+        # Manifold title fixed and swap Polymarket candidates into the first slot
+        matcher = SequenceMatcher(None)
+        
+        # New Manifold markets against every known Polymarket market
+        for manifold_key in new_manifold:
+            _, manifold_title_norm, manifold_tokens = self._titles[manifold_key]
+            matcher.set_seq2(manifold_title_norm)
+            for poly_key in self.candidate_keys(manifold_tokens, self._poly_index):
+                self._match(matcher, poly_key, manifold_key)
+        
+        # New Polymarket markets against previously known Manifold markets
+        for poly_key in new_poly:
+            for manifold_key in self.candidate_keys(self._titles[poly_key][2], self._manifold_index):
+                matcher.set_seq2(self._titles[manifold_key][1])
+                self._match(matcher, poly_key, manifold_key)
+        
+        for key in new_manifold:
+            self._index_add(self._manifold_index, key, self._titles[key][2])
+        
+        return current
+    
+    def find_arbitrage_opportunities(self, markets, limit=None):
         """
         Find markets with same question but different prices across platforms
-        Returns list of arbitrage opportunities
+        Returns list of arbitrage opportunities, widest spread first (top `limit` if given)
+        
+        Title normalizations and matched pairs persist across calls, so after the
+        first scan only new markets are matched and known pairs just get their
+        spreads recomputed from the current prices. Pairs are kept ranked by
+        spread, so only the returned opportunities are built
+        
+        markets is a MarketTable (a list of market dicts is converted)
         """
-        opportunities = []
-        polymarket_markets = [m for m in markets if m['source'] == 'Polymarket']
-        manifold_markets = [m for m in markets if m['source'] == 'Manifold']
+        if not isinstance(markets, MarketTable):
+            markets = MarketTable.from_markets(markets)
         
-        # Compare each Polymarket market with Manifold markets
-        for poly_market in polymarket_markets:
-            poly_title_norm = self.normalize_title(poly_market['title'])
+        with self._lock:
+            current = self.update_matches(markets)
+            prices = markets.column('market_prob')
+            
+            for pair in self._matched_pairs:
+                spread_percent = abs(float(prices[current[pair[0]]]) - float(prices[current[pair[1]]])) * 100
+                # Only flag if spread is significant (>5%)
+                if spread_percent >= 5.0:
+                    self._spread_ranking.update(pair, spread_percent)
+                else:
+                    self._spread_ranking.remove(pair)
             
-            for manifold_market in manifold_markets:
-                manifold_title_norm = self.normalize_title(manifold_market['title'])
-                
-                # Check similarity
-                similarity = self.calculate_similarity(poly_title_norm, manifold_title_norm)
-                
-                if similarity >= self.similarity_threshold:
-                    # Calculate price spread
-                    poly_price = poly_market['market_prob']
-                    manifold_price = manifold_market['market_prob']
-                    spread = abs(poly_price - manifold_price)
-                    spread_percent = spread * 100
-                    
-                    # Only flag if spread is significant (>5%)
-                    if spread_percent >= 5.0:
-                        # Determine which platform is cheaper
-                        if poly_price < manifold_price:
-                            cheaper_platform = 'Polymarket'
-                            expensive_platform = 'Manifold'
-                            cheaper_price = poly_price
-                            expensive_price = manifold_price
-                            cheaper_url = poly_market['url']
-                            expensive_url = manifold_market['url']
-                        else:
-                            cheaper_platform = 'Manifold'
-                            expensive_platform = 'Polymarket'
-                            cheaper_price = manifold_price
-                            expensive_price = poly_price
-                            cheaper_url = manifold_market['url']
-                            expensive_url = poly_market['url']
-                        
-                        # Calculate potential arbitrage profit
-                        # If you buy on cheaper platform and sell on expensive
-                        potential_profit_percent = spread_percent
-                        
-                        opportunity = {
-                            'question': poly_market['title'],  # Use Polymarket title
-                            'similarity_score': round(similarity, 3),
-                            'spread_percent': round(spread_percent, 2),
-                            'cheaper_platform': cheaper_platform,
-                            'expensive_platform': expensive_platform,
-                            'cheaper_price': round(cheaper_price * 100, 1),
-                            'expensive_price': round(expensive_price * 100, 1),
-                            'potential_profit': round(potential_profit_percent, 2),
-                            'cheaper_url': cheaper_url,
-                            'expensive_url': expensive_url,
-                            'polymarket_liquidity': poly_market['liquidity'],
-                            'manifold_liquidity': manifold_market['liquidity'],
-                            'strategy': f"Buy YES on {cheaper_platform} at {round(cheaper_price * 100, 1)}%, sell on {expensive_platform} at {round(expensive_price * 100, 1)}%"
-                        }
-                        
-                        opportunities.append(opportunity)
-        
-        # Sort by spread (highest arbitrage first)
-        opportunities.sort(key=lambda x: x['spread_percent'], reverse=True)
+            ranked = self._spread_ranking.top_k(limit if limit is not None else len(self._spread_ranking))
+            opportunities = []
+            for (poly_key, manifold_key), _ in ranked:
+                opportunity = self._build_opportunity(
+                    markets, current[poly_key], current[manifold_key], self._matched_pairs[(poly_key, manifold_key)]
+                )
+                if opportunity:
+                    opportunities.append(opportunity)
         
         return opportunities
     
+    def _build_opportunity(self, markets, poly_row, manifold_row, similarity):
+        """Price a matched pair of table rows; returns None when the spread is too small"""
+        prices = markets.column('market_prob')
+        urls = markets.column('url')
+        liquidities = markets.column('liquidity')
+        
+        # Calculate price spread
+        poly_price = float(prices[poly_row])
+        manifold_price = float(prices[manifold_row])
+        spread = abs(poly_price - manifold_price)
+        spread_percent = spread * 100
+        
+        # Only flag if spread is significant (>5%)
+        if spread_percent >= 5.0:
+            # Determine which platform is cheaper
+            if poly_price < manifold_price:
+                cheaper_platform = 'Polymarket'
+                expensive_platform = 'Manifold'
+                cheaper_price = poly_price
+                expensive_price = manifold_price
+                cheaper_url = urls[poly_row]
+                expensive_url = urls[manifold_row]
+            else:
+                cheaper_platform = 'Manifold'
+                expensive_platform = 'Polymarket'
+                cheaper_price = manifold_price
+                expensive_price = poly_price
+                cheaper_url = urls[manifold_row]
+                expensive_url = urls[poly_row]
+            
+            # Calculate potential arbitrage profit
+            # If you buy on cheaper platform and sell on expensive
+            potential_profit_percent = spread_percent
+            
+            return {
+                'question': markets.column('title')[poly_row],  # Use Polymarket title
+                'similarity_score': round(similarity, 3),
+                'spread_percent': round(spread_percent, 2),
+                'cheaper_platform': cheaper_platform,
+                'expensive_platform': expensive_platform,
+                'cheaper_price': round(cheaper_price * 100, 1),
+                'expensive_price': round(expensive_price * 100, 1),
+                'potential_profit': round(potential_profit_percent, 2),
+                'cheaper_url': cheaper_url,
+                'expensive_url': expensive_url,
+                'polymarket_liquidity': float(liquidities[poly_row]),
+                'manifold_liquidity': float(liquidities[manifold_row]),
+                'strategy': f"Buy YES on {cheaper_platform} at {round(cheaper_price * 100, 1)}%, sell on {expensive_platform} at {round(expensive_price * 100, 1)}%"
+            }
+        
+        return None
+    
     def get_arbitrage_summary(self, opportunities):
         """Generate summary statistics for arbitrage opportunities"""
         if not opportunities:
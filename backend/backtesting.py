@@ -1,17 +1,51 @@
 import random
+import os
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
+# Trading rules shared by the single-path backtest, Monte Carlo and parameter sweeps
+DEFAULT_PARAMS = {
+    'min_inefficiency': 0.08,  # Only trade markets at or above this score
+    'stake': 50,
+    'base_win_rate': 0.60,
+    'edge_multiplier': 0.5,  # Win rate added per point of inefficiency score
+    'loss_fraction': 0.5,  # Share of the stake lost on a losing trade
+    'max_win_rate': 0.85
+}
+
+# Metrics a sweep table reports and can be ranked by
+SWEEP_METRICS = ('final_capital', 'roi', 'win_rate', 'max_drawdown_percent')
+
+# Markets held by each sweep worker process (sent once by the initializer)
+_worker_markets = None
+
+def _init_sweep_worker(markets):
+    """Receive the sweep's markets once per worker process"""
+    global _worker_markets
+    _worker_markets = markets
+
+def _run_sweep_config(index, params, days, paths, seed):
+    """Monte Carlo run for one parameter set inside a worker process"""
+    results = BacktestingEngine().run_monte_carlo(_worker_markets, days=days, paths=paths, seed=seed, params=params)
+    return index, params, results
+
 class BacktestingEngine:
     """Simulates historical trading performance"""
     
     def __init__(self):
         self.backtest_results = None
+        self.monte_carlo_results = None
+        self.sweep_results = None
         
-    def run_backtest(self, markets, days=30):
+    def run_backtest(self, markets, days=30, params=None):
         """
         Simulate trading over the past N days using current markets as a proxy
         In a real implementation, this would use actual historical market data
+        params overrides any of DEFAULT_PARAMS
         """
+        params = self._resolve_params(params)
         trades = []
         total_capital = 1000
         current_capital = 1000
@@ -21,7 +55,7 @@ class BacktestingEngine:
             trade_date = datetime.now() - timedelta(days=days-day)
             
             # Select 2-3 random markets per day that meet threshold
-            daily_markets = [m for m in markets if m['inefficiency_score'] >= 0.08]
+            daily_markets = [m for m in markets if m['inefficiency_score'] >= params['min_inefficiency']]
             if not daily_markets:
                 continue
                 
@@ -36,18 +70,18 @@ class BacktestingEngine:
                 
                 # Simulate outcome based on AI's edge
                 # Higher inefficiency = higher win probability
-                base_win_rate = 0.60
-                edge = market['inefficiency_score'] * 0.5  # Convert score to edge
-                win_probability = min(0.85, base_win_rate + edge)
+                base_win_rate = params['base_win_rate']
+                edge = market['inefficiency_score'] * params['edge_multiplier']  # Convert score to edge
+                win_probability = min(params['max_win_rate'], base_win_rate + edge)
                 
                 is_winner = random.random() < win_probability
                 
                 # Calculate P&L
-                stake = 50
+                stake = params['stake']
                 if is_winner:
                     profit = stake * (market['recommendation']['expected_roi'] / 100)
                 else:
-                    profit = -stake * 0.5
+                    profit = -stake * params['loss_fraction']
                 
                 current_capital += profit
                 
@@ -127,6 +161,187 @@ class BacktestingEngine:
         self.backtest_results = results
         return results
     
+    def run_monte_carlo(self, markets, days=30, paths=10000, seed=None, confidence=0.95, params=None):
+        """
+        Simulate many backtest paths at once with NumPy
+        Each path follows run_backtest's rules (2-3 distinct eligible markets a day,
+        HOLDs skipped, same win probability and P&L) and the result is a distribution
+        of final capital, max drawdown, win rate and ROI with confidence intervals
+        """
+        params = self._resolve_params(params)
+        eligible = [m for m in markets if m['inefficiency_score'] >= params['min_inefficiency']]
+        if not eligible:
+            self.monte_carlo_results = None
+            return None
+        
+        rng = np.random.default_rng(seed)
+        scores = np.array([m['inefficiency_score'] for m in eligible], dtype=np.float64)
+        expected_rois = np.array([m['recommendation']['expected_roi'] for m in eligible], dtype=np.float64)
+        tradable = np.array([m['recommendation']['action'] != 'HOLD' for m in eligible])
+        win_probabilities = np.minimum(params['max_win_rate'], params['base_win_rate'] + scores * params['edge_multiplier'])
+        n = len(eligible)
+        shape = (paths, days)
+        
+        # Pick up to 3 distinct markets per path-day without replacement: each later
+        # draw comes from a smaller range and is shifted past the earlier picks
+        picks_per_day = np.minimum(rng.integers(2, 4, size=shape), n)
+        first = rng.integers(0, n, size=shape)
+        second = rng.integers(0, max(n - 1, 1), size=shape)
+        second += second >= first
+        third = rng.integers(0, max(n - 2, 1), size=shape)
+        low = np.minimum(first, second)
+        high = np.maximum(first, second)
+        third += third >= low
+        third += third >= high
+        picks = np.minimum(np.stack([first, second, third], axis=2), n - 1)  # (paths, days, 3)
+        
+        slots = np.arange(3)
+        traded = (slots < picks_per_day[:, :, None]) & tradable[picks]
+        wins = traded & (rng.random(picks.shape) < win_probabilities[picks])
+        
+        stake = params['stake']
+        profits = np.where(wins, stake * (expected_rois[picks] / 100), -stake * params['loss_fraction'])
+        profits = np.where(traded, profits, 0.0).reshape(paths, -1)
+        
+        # Capital after every trade slot, starting from the initial 1000
+        initial_capital = 1000
+        capital = initial_capital + np.cumsum(profits, axis=1)
+        peaks = np.maximum(np.maximum.accumulate(capital, axis=1), initial_capital)
+        max_drawdown = ((peaks - capital) / peaks).max(axis=1) * 100
+        
+        trade_counts = traded.reshape(paths, -1).sum(axis=1)
+        win_counts = wins.reshape(paths, -1).sum(axis=1)
+        has_trades = trade_counts > 0
+        safe_counts = np.maximum(trade_counts, 1)
+        win_rates = np.where(has_trades, win_counts / safe_counts * 100, 0.0)
+        total_profit = capital[:, -1] - initial_capital
+        rois = np.where(has_trades, total_profit / (safe_counts * stake) * 100, 0.0)
+        
+        results = {
+            'paths': paths,
+            'days_tested': days,
+            'eligible_markets': n,
+            'params': params,
+            'confidence': confidence,
+            'probability_of_profit': round(float((total_profit > 0).mean()) * 100, 1),
+            'avg_trades_per_path': round(float(trade_counts.mean()), 1),
+            'final_capital': self._distribution(capital[:, -1], confidence),
+            'max_drawdown_percent': self._distribution(max_drawdown, confidence),
+            'win_rate': self._distribution(win_rates, confidence),
+            'roi': self._distribution(rois, confidence)
+        }
+        
+        self.monte_carlo_results = results
+        return results
+    
+    def iter_sweep(self, markets, grid, days=30, paths=2000, seed=0, workers=None):
+        """
+        Run a Monte Carlo backtest for every combination in a parameter grid
+        grid maps DEFAULT_PARAMS names to lists of values. Runs are spread over a
+        process pool (workers=0 runs them in-process) and each gets its own seed
+        spawned from `seed`, so results don't depend on scheduling or worker count.
+        Yields (params, monte_carlo_results) as runs finish
+        """
+        unknown = set(grid) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown backtest parameters: {', '.join(sorted(unknown))}")
+        
+        names = list(grid)
+        configs = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+        seeds = np.random.SeedSequence(seed).spawn(len(configs))
+        
+        # Workers only need the fields the simulation reads
+        slim_markets = [
+            {
+                'inefficiency_score': m['inefficiency_score'],
+                'recommendation': {'action': m['recommendation']['action'], 'expected_roi': m['recommendation']['expected_roi']}
+            }
+            for m in markets
+        ]
+        
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 0 or len(configs) <= 1:
+            for params, run_seed in zip(configs, seeds):
+                yield params, BacktestingEngine().run_monte_carlo(slim_markets, days=days, paths=paths, seed=run_seed, params=params)
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker, initargs=(slim_markets,)) as pool:
+            futures = [
+                pool.submit(_run_sweep_config, i, params, days, paths, run_seed)
+                for i, (params, run_seed) in enumerate(zip(configs, seeds))
+            ]
+            for future in as_completed(futures):
+                _, params, results = future.result()
+                yield params, results
+    
+    def run_sweep(self, markets, grid, days=30, paths=2000, seed=0, workers=None, rank_by='final_capital', on_result=None):
+        """
+        Parameter sweep collected into a table ranked by the mean of rank_by
+        (final_capital, roi, win_rate, or max_drawdown_percent, which ranks lowest first).
+        on_result(row, completed, total) is called as each run finishes
+        """
+        # Checked up front so a typo doesn't throw away a finished sweep
+        if rank_by not in SWEEP_METRICS:
+            raise ValueError(f"rank_by must be one of: {', '.join(SWEEP_METRICS)}")
+        
+        total = 1
+        for values in grid.values():
+            total *= len(values)
+        
+        rows = []
+        for params, results in self.iter_sweep(markets, grid, days=days, paths=paths, seed=seed, workers=workers):
+            rows.append(self._sweep_row(params, results))
+            if on_result is not None:
+                on_result(rows[-1], len(rows), total)
+        
+        # Runs with no eligible markets rank last
+        sign = 1 if rank_by == 'max_drawdown_percent' else -1
+        rows.sort(key=lambda row: (row[f"{rank_by}_mean"] is None, sign * (row[f"{rank_by}_mean"] or 0)))
+        for rank, row in enumerate(rows, start=1):
+            row['rank'] = rank
+        
+        self.sweep_results = rows
+        return rows
+    
+    def _sweep_row(self, params, results):
+        """One flat line of the sweep table"""
+        row = {'params': self._resolve_params(params)}
+        for metric in SWEEP_METRICS:
+            distribution = results[metric] if results else None
+            row[f"{metric}_mean"] = distribution['mean'] if distribution else None
+            row[f"{metric}_ci"] = [distribution['ci_low'], distribution['ci_high']] if distribution else None
+        row['probability_of_profit'] = results['probability_of_profit'] if results else None
+        row['avg_trades_per_path'] = results['avg_trades_per_path'] if results else 0
+        return row
+    
+    def _resolve_params(self, params):
+        """DEFAULT_PARAMS with any overrides applied"""
+        return {**DEFAULT_PARAMS, **(params or {})}
+    
+    def _distribution(self, values, confidence, bins=20):
+        """Summary statistics, percentile confidence interval and histogram for one metric"""
+        tail = (1 - confidence) / 2 * 100
+        low, p5, p25, median, p75, p95, high = np.percentile(values, [tail, 5, 25, 50, 75, 95, 100 - tail])
+        counts, edges = np.histogram(values, bins=bins)
+        return {
+            'mean': round(float(values.mean()), 2),
+            'std': round(float(values.std()), 2),
+            'median': round(float(median), 2),
+            'percentiles': {
+                'p5': round(float(p5), 2),
+                'p25': round(float(p25), 2),
+                'p75': round(float(p75), 2),
+                'p95': round(float(p95), 2)
+            },
+            'ci_low': round(float(low), 2),
+            'ci_high': round(float(high), 2),
+            'histogram': {
+                'counts': counts.tolist(),
+                'edges': [round(float(edge), 2) for edge in edges]
+            }
+        }
+    
     def _calculate_weekly_stats(self, trades):
         """Calculate performance by week"""
         weekly = {}
@@ -183,5 +398,8 @@ class BacktestingEngine:
         }
     
     def get_results(self):
-        """Return cached backtest results"""
-        return self.backtest_results or self._empty_results()
+        """Return cached backtest results, with the Monte Carlo distribution when one has been run"""
+        results = self.backtest_results or self._empty_results()
+        if self.monte_carlo_results is not None:
+            results = {**results, 'monte_carlo': self.monte_carlo_results}
+        return results
@@ -1,24 +1,50 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+import queue
 import random
+import threading
+import time
 
 load_dotenv()
 
 class DataIngestion:
     """Fetches live prediction markets from Polymarket and Manifold"""
     
-    def __init__(self):
+    def __init__(self, concurrent=True, source_deadline=10):
         self.polymarket_api = os.getenv('POLYMARKET_API')
         self.manifold_api = os.getenv('MANIFOLD_API')
+        self.concurrent = concurrent
+        self.source_deadline = source_deadline  # Seconds to wait for each venue
+        
+        # One keep-alive session per venue so parallel fetches reuse connections
+        self.polymarket_session = self._create_session()
+        self.manifold_session = self._create_session()
+        
+        # Registry of venues; add new sources here to fetch them in parallel
+        self.sources = {
+            'Polymarket': self.fetch_polymarket,
+            'Manifold': self.fetch_manifold
+        }
+        self.executor = ThreadPoolExecutor(max_workers=len(self.sources) * 2, thread_name_prefix='ingest')  # Headroom for a straggler from the last refresh
+    
+    def _create_session(self):
+        """Create a pooled HTTP session with keep-alive connections"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
         
     def fetch_polymarket(self):
         """Fetch markets from Polymarket"""
         try:
             # Fetch only ACTIVE, OPEN markets with recent activity
             url = f"{self.polymarket_api}?closed=false&active=true&limit=20"
-            response = requests.get(url, timeout=10)
+            response = self.polymarket_session.get(url, timeout=self.source_deadline)
             if response.status_code == 200:
                 markets = response.json()
                 # Filter for markets with actual prices
@@ -32,7 +58,7 @@ class DataIngestion:
     def fetch_manifold(self):
         """Fetch markets from Manifold Markets"""
         try:
-            response = requests.get(f"{self.manifold_api}?limit=20", timeout=10)
+            response = self.manifold_session.get(f"{self.manifold_api}?limit=20", timeout=self.source_deadline)
             if response.status_code == 200:
                 markets = response.json()
                 return self._normalize_manifold(markets)
@@ -41,6 +67,128 @@ class DataIngestion:
             print(f"Error fetching Manifold: {e}")
             return []
     
+    def iter_polymarket_pages(self, page_size=500, max_pages=None):
+        """
+        Stream the full open Polymarket catalog one normalized page at a time
+        Pages are requested with limit/offset until the venue runs out of markets
+        """
+        offset = 0
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            try:
+                url = f"{self.polymarket_api}?closed=false&active=true&limit={page_size}&offset={offset}"
+                response = self.polymarket_session.get(url, timeout=self.source_deadline)
+                if response.status_code != 200:
+                    print(f"⚠️ Polymarket page at offset {offset} returned {response.status_code}")
+                    return
+                markets = response.json()
+            except Exception as e:
+                print(f"Error fetching Polymarket page at offset {offset}: {e}")
+                return
+            
+            if not markets:
+                return
+            
+            active_markets = [m for m in markets if m.get('lastTradePrice') or m.get('bestBid')]
+            normalized = self._normalize_polymarket(active_markets)
+            if normalized:
+                yield normalized
+            
+            pages += 1
+            offset += len(markets)
+            if len(markets) < page_size:
+                return
+    
+    def iter_manifold_pages(self, page_size=1000, max_pages=None):
+        """
+        Stream the full open Manifold catalog one normalized page at a time
+        Manifold paginates with a `before` cursor holding the last market id seen
+        """
+        before = None
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            try:
+                url = f"{self.manifold_api}?limit={page_size}"
+                if before:
+                    url += f"&before={before}"
+                response = self.manifold_session.get(url, timeout=self.source_deadline)
+                if response.status_code != 200:
+                    print(f"⚠️ Manifold page before {before} returned {response.status_code}")
+                    return
+                markets = response.json()
+            except Exception as e:
+                print(f"Error fetching Manifold page before {before}: {e}")
+                return
+            
+            if not markets:
+                return
+            
+            # The catalog endpoint also returns resolved markets
+            open_markets = [m for m in markets if not m.get('isResolved')]
+            normalized = self._normalize_manifold(open_markets)
+            if normalized:
+                yield normalized
+            
+            pages += 1
+            before = markets[-1].get('id')
+            if len(markets) < page_size or not before:
+                return
+    
+    def iter_all_market_pages(self, max_pages=None, buffer_pages=4):
+        """
+        Stream normalized pages from every venue as they arrive
+        Each venue is paged in its own thread; the bounded buffer applies
+        backpressure so at most a few pages are held in memory at once
+        """
+        page_iterators = {
+            'Polymarket': self.iter_polymarket_pages(max_pages=max_pages),
+            'Manifold': self.iter_manifold_pages(max_pages=max_pages)
+        }
+        buffer = queue.Queue(maxsize=buffer_pages)
+        stop = threading.Event()
+        finished = object()
+        
+        def produce(name, pages):
+            try:
+                for page in pages:
+                    while not stop.is_set():
+                        try:
+                            buffer.put(page, timeout=0.5)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+            except Exception as e:
+                print(f"Error streaming {name}: {e}")
+            finally:
+                pages.close()
+                buffer.put(finished)
+        
+        producers = [
+            threading.Thread(target=produce, args=(name, pages), name=f"ingest-{name}", daemon=True)
+            for name, pages in page_iterators.items()
+        ]
+        for producer in producers:
+            producer.start()
+        
+        try:
+            remaining = len(producers)
+            while remaining:
+                page = buffer.get()
+                if page is finished:
+                    remaining -= 1
+                    continue
+                yield page
+        finally:
+            # Consumer stopped early: let producers exit and drain their sentinels
+            stop.set()
+            while any(p.is_alive() for p in producers):
+                try:
+                    buffer.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+    
     def _normalize_polymarket(self, markets):
         """Normalize Polymarket data to unified format"""
         normalized = []
@@ -106,6 +254,34 @@ class DataIngestion:
     
     def fetch_all_markets(self):
         """Fetch from all sources and combine"""
-        polymarket_data = self.fetch_polymarket()
-        manifold_data = self.fetch_manifold()
-        return polymarket_data + manifold_data
+        if not self.concurrent:
+            combined = []
+            for fetch in self.sources.values():
+                combined.extend(fetch())
+            return combined
+        return self.fetch_all_markets_concurrent()
+    
+    def fetch_all_markets_concurrent(self):
+        """
+        Fetch all sources in parallel and combine
+        Refresh latency is bounded by the slowest venue (capped at the deadline);
+        venues that miss the deadline are skipped and the rest are returned
+        """
+        start = time.time()
+        futures = {self.executor.submit(fetch): name for name, fetch in self.sources.items()}
+        done, not_done = wait(futures, timeout=self.source_deadline)
+        
+        combined = []
+        # Keep the registry order so results are stable between refreshes
+        for future, name in futures.items():
+            if future in not_done:
+                future.cancel()
+                print(f"⚠️ {name} missed the {self.source_deadline}s deadline, using partial results")
+                continue
+            try:
+                combined.extend(future.result())
+            except Exception as e:
+                print(f"Error fetching {name}: {e}")
+        
+        print(f"📡 Fetched {len(combined)} markets from {len(done)}/{len(futures)} sources in {time.time() - start:.2f}s")
+        return combined
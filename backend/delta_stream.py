@@ -0,0 +1,161 @@
+from collections import deque
+import threading
+import numpy as np
+from market_table import FLOAT_COLUMNS, INT_COLUMNS, RECOMMENDATION_FIELDS
+from response_cache import dumps
+
+# Per-market fields whose changes are streamed (recommendation fields are nested, as in the API)
+DELTA_FIELDS = (
+    'market_prob', 'liquidity', 'volume', 'ai_probability', 'inefficiency_score', 'news_sentiment',
+    'score_label', 'score_color', 'reasoning'
+) + RECOMMENDATION_FIELDS
+
+class DeltaLog:
+    """
+    Bounded, sequence-numbered log of refresh deltas for streaming clients
+    Each event is serialized once when appended; a client resumes by asking for
+    everything after the last sequence number it saw. The oldest events are dropped
+    once there are more than max_events or their JSON exceeds max_bytes in total
+    (the newest event is always kept). If a client's number has already fallen out
+    of the buffer, the caller has to start again from a full snapshot
+    """
+    
+    def __init__(self, max_events=1000, max_bytes=32 * 1024 * 1024):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self._events = deque()  # (seq, event name, JSON text)
+        self._sizes = deque()  # Encoded size of each buffered event's JSON
+        self._bytes = 0  # Total of _sizes
+        self._seq = 0
+        self._changed = threading.Condition()
+    
+    @property
+    def last_seq(self):
+        return self._seq
+    
+    def append(self, event, payload):
+        """Record one event and wake waiting streams; returns its sequence number"""
+        encoded = dumps(payload)
+        data = encoded.decode('utf-8')
+        with self._changed:
+            self._seq += 1
+            self._events.append((self._seq, event, data))
+            self._sizes.append(len(encoded))
+            self._bytes += len(encoded)
+            while len(self._events) > 1 and (len(self._events) > self.max_events or self._bytes > self.max_bytes):
+                self._events.popleft()
+                self._bytes -= self._sizes.popleft()
+            self._changed.notify_all()
+            return self._seq
+    
+    def reset(self):
+        """Drop buffered events so every stream falls back to a full snapshot"""
+        with self._changed:
+            self._seq += 1
+            self._events.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self._changed.notify_all()
+    
+    def since(self, seq):
+        """Events after seq, or None when seq can't be resumed from (too old or unknown)"""
+        with self._changed:
+            return self._since(seq)
+    
+    def _since(self, seq):
+        """Events after seq (lock held)"""
+        if seq > self._seq:
+            return None
+        if seq == self._seq:
+            return []
+        if not self._events or self._events[0][0] > seq + 1:
+            return None
+        return [entry for entry in self._events if entry[0] > seq]
+    
+    def wait(self, seq, timeout):
+        """Like since(), but blocks up to timeout for something newer than seq"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._seq != seq, timeout=timeout)
+            return self._since(seq)
+
+def format_event(seq, event, data):
+    """One Server-Sent Events frame"""
+    return f"id: {seq}\nevent: {event}\ndata: {data}\n\n"
+
+def _changed_mask(old_values, new_values, name):
+    """Rows whose value differs between two aligned columns"""
+    if name in FLOAT_COLUMNS:
+        return (old_values != new_values) & ~(np.isnan(old_values) & np.isnan(new_values))
+    if name in INT_COLUMNS:
+        return old_values != new_values
+    return np.fromiter((a != b for a, b in zip(old_values, new_values)), dtype=bool, count=len(new_values))
+
+def diff_markets(old, new):
+    """
+    Per-market changes between two snapshots (MarketTables)
+    Returns {'changed': [patch], 'added': [market dict], 'removed': [{'id', 'source'}]}
+    where a patch carries id, source and only the fields that changed
+    """
+    old_rows = {key: row for row, key in enumerate(old.keys())}
+    matched_old = []
+    matched_new = []
+    added = []
+    for row, key in enumerate(new.keys()):
+        old_row = old_rows.pop(key, None)
+        if old_row is None:
+            added.append(row)
+        else:
+            matched_old.append(old_row)
+            matched_new.append(row)
+    
+    matched_old = np.asarray(matched_old, dtype=np.intp)
+    matched_new = np.asarray(matched_new, dtype=np.intp)
+    changed_fields = {}
+    any_changed = np.zeros(len(matched_new), dtype=bool)
+    for name in DELTA_FIELDS:
+        old_column = old.column(name)
+        new_column = new.column(name)
+        if name in FLOAT_COLUMNS or name in INT_COLUMNS:
+            mask = _changed_mask(old_column[matched_old], new_column[matched_new], name)
+        else:
+            mask = _changed_mask([old_column[i] for i in matched_old.tolist()], [new_column[i] for i in matched_new.tolist()], name)
+        changed_fields[name] = mask
+        any_changed |= mask
+    
+    positions = np.flatnonzero(any_changed)
+    changed = []
+    for position, market in zip(positions.tolist(), new.to_dicts(matched_new[positions])):
+        patch = {'id': market['id'], 'source': market['source']}
+        for name in DELTA_FIELDS:
+            if changed_fields[name][position]:
+                if name in RECOMMENDATION_FIELDS:
+                    patch.setdefault('recommendation', {})[name] = market['recommendation'][name]
+                else:
+                    patch[name] = market[name]
+        changed.append(patch)
+    
+    return {
+        'changed': changed,
+        'added': new.to_dicts(added),
+        'removed': [{'id': market_id, 'source': source} for source, market_id in old_rows]
+    }
+
+def arbitrage_pair_id(opportunity):
+    """Stable identity for an arbitrage pair, whichever side is currently cheaper"""
+    return '|'.join(sorted((opportunity['cheaper_url'], opportunity['expensive_url'])))
+
+def diff_arbitrage(old_view, new_view):
+    """New and vanished arbitrage pairs between two arbitrage views"""
+    old_opportunities = (old_view or {}).get('opportunities', [])
+    new_opportunities = (new_view or {}).get('opportunities', [])
+    old_ids = {arbitrage_pair_id(opp) for opp in old_opportunities}
+    new_ids = {arbitrage_pair_id(opp) for opp in new_opportunities}
+    
+    return {
+        'added': [
+            {'pair_id': arbitrage_pair_id(opp), 'opportunity': opp}
+            for opp in new_opportunities if arbitrage_pair_id(opp) not in old_ids
+        ],
+        'removed': sorted(old_ids - new_ids),
+        'summary': (new_view or {}).get('summary')
+    }
@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+
+class EnrichmentEngine:
+    """Runs per-market enrichment concurrently on a bounded thread pool"""
+    
+    def __init__(self, max_workers=16):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enrich')
+    
+    def map(self, fn, items):
+        """
+        Apply fn to every item concurrently; results come back in input order
+        Items whose call raised are returned as None so one bad market can't sink the batch
+        """
+        futures = [self.executor.submit(fn, item) for item in items]
+        
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error processing market: {e}")
+                results.append(None)
+        return results
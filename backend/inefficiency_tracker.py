@@ -1,67 +1,195 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+import threading
+import numpy as np
+
+# Rollup resolutions in seconds, and how many buckets of each are kept
+ROLLUPS = {
+    '1m': (60, 7 * 24 * 60),  # One week of minutes
+    '1h': (3600, 90 * 24),  # 90 days of hours
+    '1d': (86400, 2 * 365)  # Two years of days
+}
+
+class _Ring:
+    """
+    Fixed-capacity, array-backed series ordered by time
+    Appends overwrite the oldest slot once full; the live region is at most two
+    sorted segments of the arrays, so range lookups are binary searches
+    """
+    
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in fields}
+        self.size = 0
+        self.head = 0  # Next slot to write
+    
+    def append(self, **values):
+        for name, value in values.items():
+            self.columns[name][self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+    
+    @property
+    def last(self):
+        """Slot of the newest entry"""
+        return (self.head - 1) % self.capacity
+    
+    def covers(self, start):
+        """Whether nothing at or after start has been overwritten yet"""
+        oldest = self.head if self.size == self.capacity else 0
+        return self.size < self.capacity or self.columns['timestamp'][oldest] <= start
+    
+    def segments(self):
+        """(start, stop) slot ranges of the live entries, oldest first"""
+        if self.size < self.capacity:
+            return [(0, self.size)]
+        return [(self.head, self.capacity), (0, self.head)]
+    
+    def range(self, key, start, end):
+        """Slot indices with start <= key < end, oldest first"""
+        parts = []
+        for low, high in self.segments():
+            keys = self.columns[key][low:high]
+            first = low + int(np.searchsorted(keys, start, side='left'))
+            stop = low + int(np.searchsorted(keys, end, side='left'))
+            if first < stop:
+                parts.append(np.arange(first, stop))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.intp)
 
 class InefficiencyTracker:
-    """Tracks inefficiency scores over time for historical visualization"""
+    """
+    Tracks average inefficiency over time for historical visualization
+    Every snapshot goes into a raw ring buffer and is folded into 1-minute, 1-hour
+    and 1-day rollups as it arrives, so appends are O(1) and a chart for any range
+    is a binary search plus a slice at a resolution that keeps it small
+    """
     
-    def __init__(self):
-        self.history = []
-        self.max_history_points = 100  # Keep last 100 data points
-        
-    def record_snapshot(self, markets):
-        """Record current average inefficiency"""
-        if not markets:
-            return
-        
-        # Calculate average inefficiency
-        inefficiency_scores = [m['inefficiency_score'] for m in markets]
-        avg_inefficiency = sum(inefficiency_scores) / len(inefficiency_scores)
-        
-        # Record data point
-        data_point = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M'),
-            'avg_inefficiency': round(avg_inefficiency, 4),
-            'num_markets': len(markets),
-            'high_inefficiency_count': len([m for m in markets if m['inefficiency_score'] >= 0.15])
+    def __init__(self, raw_capacity=14 * 24 * 60):
+        self._lock = threading.Lock()
+        self.raw = _Ring(raw_capacity, [
+            ('timestamp', np.float64),
+            ('avg_inefficiency', np.float64),
+            ('num_markets', np.int32),
+            ('high_inefficiency_count', np.int32)
+        ])
+        self.rollups = {
+            name: (seconds, _Ring(capacity, [
+                ('timestamp', np.float64),  # Bucket start
+                ('samples', np.int32),
+                ('sum_inefficiency', np.float64),
+                ('min_inefficiency', np.float64),
+                ('max_inefficiency', np.float64),
+                ('sum_markets', np.int64),
+                ('sum_high', np.int64)
+            ]))
+            for name, (seconds, capacity) in ROLLUPS.items()
         }
+    
+    def record_snapshot(self, inefficiency_scores, timestamp=None):
+        """Record current average inefficiency from a column of market scores"""
+        inefficiency_scores = np.asarray(inefficiency_scores, dtype=np.float64)
+        if not len(inefficiency_scores):
+            return
         
-        self.history.append(data_point)
-        
-        # Keep only last N points
-        if len(self.history) > self.max_history_points:
-            self.history = self.history[-self.max_history_points:]
+        self.record(
+            timestamp if timestamp is not None else datetime.now().timestamp(),
+            float(inefficiency_scores.mean()),
+            len(inefficiency_scores),
+            int(np.count_nonzero(inefficiency_scores >= 0.15))
+        )
     
-    def get_history(self):
-        """Return inefficiency history for charting"""
-        return self.history
+    def record(self, timestamp, avg_inefficiency, num_markets, high_count):
+        """Append one aggregated data point (O(1))"""
+        with self._lock:
+            # Keep the series ordered: a late point is filed at the newest time seen
+            if self.raw.size:
+                timestamp = max(timestamp, float(self.raw.columns['timestamp'][self.raw.last]))
+            
+            self.raw.append(
+                timestamp=timestamp,
+                avg_inefficiency=avg_inefficiency,
+                num_markets=num_markets,
+                high_inefficiency_count=high_count
+            )
+            
+            for seconds, ring in self.rollups.values():
+                bucket = timestamp - timestamp % seconds
+                columns = ring.columns
+                if ring.size and columns['timestamp'][ring.last] == bucket:
+                    slot = ring.last
+                    columns['samples'][slot] += 1
+                    columns['sum_inefficiency'][slot] += avg_inefficiency
+                    columns['min_inefficiency'][slot] = min(columns['min_inefficiency'][slot], avg_inefficiency)
+                    columns['max_inefficiency'][slot] = max(columns['max_inefficiency'][slot], avg_inefficiency)
+                    columns['sum_markets'][slot] += num_markets
+                    columns['sum_high'][slot] += high_count
+                else:
+                    ring.append(
+                        timestamp=bucket,
+                        samples=1,
+                        sum_inefficiency=avg_inefficiency,
+                        min_inefficiency=avg_inefficiency,
+                        max_inefficiency=avg_inefficiency,
+                        sum_markets=num_markets,
+                        sum_high=high_count
+                    )
     
-    def generate_mock_history(self, current_markets, hours=24):
+    def query(self, start=None, end=None, resolution='auto', max_points=200):
         """
-        Generate mock historical data for demo purposes
-        In production, this would use actual stored data
+        Data points with start <= timestamp < end, oldest first
+        resolution is 'raw', '1m', '1h', '1d' or 'auto' (the finest one whose
+        points in the range fit in max_points)
         """
-        mock_history = []
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
         
-        if not current_markets:
-            return mock_history
+        with self._lock:
+            if resolution == 'auto':
+                resolution = '1d'
+                for name in ('raw', '1m', '1h'):
+                    ring = self._ring(name)
+                    if ring.covers(start) and len(ring.range('timestamp', start, end)) <= max_points:
+                        resolution = name
+                        break
+            
+            ring = self._ring(resolution)
+            slots = ring.range('timestamp', start, end)
+            columns = {name: values[slots] for name, values in ring.columns.items()}
         
-        # Current average
-        current_avg = sum(m['inefficiency_score'] for m in current_markets) / len(current_markets)
+        if resolution == 'raw':
+            averages = columns['avg_inefficiency']
+            markets = columns['num_markets']
+            highs = columns['high_inefficiency_count']
+            min_values = max_values = None
+        else:
+            samples = columns['samples']
+            averages = columns['sum_inefficiency'] / samples
+            markets = np.round(columns['sum_markets'] / samples)
+            highs = np.round(columns['sum_high'] / samples)
+            min_values = columns['min_inefficiency']
+            max_values = columns['max_inefficiency']
         
-        # Generate hourly data points going back
-        for hour in range(hours):
-            time_ago = datetime.now() - timedelta(hours=hours-hour)
-            
-            # Add realistic variance (±0.05 from current avg)
-            variance = (hash(hour) % 100 - 50) / 1000  # Deterministic randomness
-            avg_ineff = max(0.05, min(0.30, current_avg + variance))
-            
-            data_point = {
-                'timestamp': time_ago.strftime('%m/%d %H:%M'),
-                'avg_inefficiency': round(avg_ineff, 4),
-                'num_markets': len(current_markets),
-                'high_inefficiency_count': int(len(current_markets) * (avg_ineff / 0.25))
+        points = []
+        for i, timestamp in enumerate(columns['timestamp'].tolist()):
+            point = {
+                'timestamp': datetime.fromtimestamp(timestamp).strftime('%m/%d %H:%M'),
+                'time': timestamp,
+                'avg_inefficiency': round(float(averages[i]), 4),
+                'num_markets': int(markets[i]),
+                'high_inefficiency_count': int(highs[i])
             }
-            
-            mock_history.append(data_point)
-        
-        return mock_history
+            if min_values is not None:
+                point['min_inefficiency'] = round(float(min_values[i]), 4)
+                point['max_inefficiency'] = round(float(max_values[i]), 4)
+            points.append(point)
+        return points
+    
+    def _ring(self, resolution):
+        if resolution == 'raw':
+            return self.raw
+        if resolution not in self.rollups:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        return self.rollups[resolution][1]
+    
+    def get_history(self, hours=24, resolution='auto', max_points=200):
+        """Return inefficiency history for charting (the last `hours` hours)"""
+        return self.query(start=datetime.now().timestamp() - hours * 3600, resolution=resolution, max_points=max_points)
@@ -0,0 +1,86 @@
+import re
+import threading
+
+# Analytics categories in priority order: a title gets the first one it matches
+CATEGORY_KEYWORDS = [
+    ('Politics', ['trump', 'election', 'president', 'political', 'senate', 'congress']),
+    ('Crypto', ['bitcoin', 'crypto', 'eth', 'btc', 'cryptocurrency']),
+    ('Sports', ['nba', 'nfl', 'sports', 'game', 'championship']),
+    ('Weather', ['weather', 'rain', 'temperature', 'snow']),
+    ('Economy', ['market', 'stock', 'economy', 'gdp', 'inflation'])
+]
+
+# Keywords that switch on the PredictionModel's special-case signals
+SIGNAL_KEYWORDS = {
+    'crypto_signal': ['bitcoin', 'btc', 'ethereum', 'eth', 'crypto', 'cryptocurrency'],
+    'political_signal': ['trump', 'biden', 'election', 'president', 'political', 'congress'],
+    'weather_signal': ['rain', 'snow', 'temperature', 'weather', 'storm', 'hurricane']
+}
+
+class KeywordClassifier:
+    """
+    Tags a market title with every category and signal whose keywords it contains
+    All keywords are compiled into one regex and the title is scanned once.
+    Matching keeps the substring semantics of `keyword in title.lower()`
+    """
+    
+    def __init__(self, category_keywords=None, signal_keywords=None, max_memo_entries=100000):
+        self.category_keywords = category_keywords or CATEGORY_KEYWORDS
+        self.signal_keywords = signal_keywords or SIGNAL_KEYWORDS
+        self.categories = [category for category, _ in self.category_keywords]
+        self.max_memo_entries = max_memo_entries
+        
+        keyword_tags = {}
+        for tag, keywords in list(self.category_keywords) + list(self.signal_keywords.items()):
+            for keyword in keywords:
+                keyword_tags.setdefault(keyword, set()).add(tag)
+        
+        # A lookahead match is tried at every position, but only one alternative wins
+        # per position. Longest keywords go first, and each carries the tags of every
+        # keyword that is its prefix, so no keyword starting at that position is lost
+        ordered = sorted(keyword_tags, key=len, reverse=True)
+        self._tags = {
+            keyword: frozenset().union(*(keyword_tags[k] for k in keyword_tags if keyword.startswith(k)))
+            for keyword in ordered
+        }
+        self._pattern = re.compile('(?=(' + '|'.join(re.escape(k) for k in ordered) + '))')
+        
+        self._memo = {}  # market key (or title) -> (title, tags)
+        self._lock = threading.Lock()
+    
+    def _scan(self, title):
+        """All tags for a title in one regex pass"""
+        tags = set()
+        for match in self._pattern.finditer(title.lower()):
+            tags |= self._tags[match.group(1)]
+        return frozenset(tags)
+    
+    def classify(self, title, key=None):
+        """Tags for a title, memoized per market key (or per title when no key is given)"""
+        memo_key = key if key is not None else title
+        entry = self._memo.get(memo_key)
+        if entry is not None and entry[0] == title:
+            return entry[1]
+        
+        tags = self._scan(title)
+        with self._lock:
+            if len(self._memo) >= self.max_memo_entries:
+                self._memo.clear()
+            self._memo[memo_key] = (title, tags)
+        return tags
+    
+    def classify_market(self, market):
+        """Tags for a market dict, memoized on its (source, id) key"""
+        key = (market.get('source'), market.get('id') or market['title'])
+        return self.classify(market['title'], key)
+    
+    def category(self, title, key=None):
+        """Highest-priority analytics category for a title, or 'Other'"""
+        tags = self.classify(title, key)
+        for category in self.categories:
+            if category in tags:
+                return category
+        return 'Other'
+
+# Shared by analytics and prediction so each title is scanned once
+keyword_classifier = KeywordClassifier()
@@ -0,0 +1,183 @@
+from collections import OrderedDict
+import base64
+import threading
+import numpy as np
+from keyword_classifier import keyword_classifier
+from response_cache import SerializedResponse
+
+# Sortable API fields -> table columns (always ranked highest first unless order=asc)
+SORT_KEYS = {
+    'inefficiency': 'inefficiency_score',
+    'liquidity': 'liquidity',
+    'volume': 'volume',
+    'market_prob': 'market_prob',
+    'ai_probability': 'ai_probability',
+    'expected_roi': 'expected_roi',
+    'confidence': 'confidence',
+    'gap': 'gap'
+}
+FILTER_PARAMS = ('source', 'category', 'action')
+QUERY_PARAMS = FILTER_PARAMS + ('min_inefficiency', 'sort', 'order', 'page', 'page_size', 'cursor')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_NO_ROWS = np.zeros(0, dtype=np.intp)
+
+class StaleCursorError(ValueError):
+    """A cursor issued for an earlier snapshot, whose row order may have changed since"""
+
+class MarketQueryIndex:
+    """
+    Per-snapshot indexes for filtered, sorted, paginated market queries
+    Built once when a snapshot is published: posting lists per source/category/action,
+    one sort order per sortable field and a score order for thresholds. A request
+    combines them with NumPy masks instead of scanning the market dicts
+    """
+    
+    def __init__(self, markets, version=0, timestamp=0, max_cached_pages=256):
+        self.markets = markets
+        self.version = version
+        self.timestamp = timestamp
+        self.max_cached_pages = max_cached_pages
+        
+        categories = [
+            keyword_classifier.category(title, key)
+            for title, key in zip(markets.column('title'), markets.keys())
+        ]
+        self.postings = {
+            'source': self._postings(markets.column('source')),
+            'category': self._postings(categories),
+            'action': self._postings(markets.column('action'))
+        }
+        
+        # Stable sorts both ways; ties keep the snapshot's ranking order
+        self.orders = {}
+        for name, column in SORT_KEYS.items():
+            values = markets.column(column).astype(np.float64)
+            self.orders[name] = {
+                'desc': np.argsort(-values, kind='stable'),
+                'asc': np.argsort(values, kind='stable')
+            }
+        self._sorted_neg_scores = -markets.column('inefficiency_score')[self.orders['inefficiency']['desc']]
+        
+        self._pages = OrderedDict()  # Normalized query -> SerializedResponse, least recently used first
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _postings(values):
+        """Row positions per (lowercased) value, in snapshot order"""
+        rows = {}
+        for i, value in enumerate(values):
+            rows.setdefault(value.lower(), []).append(i)
+        return {value: np.asarray(positions, dtype=np.intp) for value, positions in rows.items()}
+    
+    def encode_cursor(self, offset):
+        """Opaque token for the next page, tied to this snapshot's version"""
+        return base64.urlsafe_b64encode(f"{self.version}:{offset}".encode()).decode().rstrip('=')
+    
+    def decode_cursor(self, cursor):
+        """Offset from a cursor token; raises StaleCursorError if it belongs to another snapshot"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            version, offset = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+            version, offset = int(version), int(offset)
+        except Exception:
+            raise ValueError('Invalid cursor')
+        if offset < 0:
+            raise ValueError('Invalid cursor')
+        if version != self.version:
+            raise StaleCursorError('Cursor is from an older snapshot; restart from the first page')
+        return offset
+    
+    def parse(self, args):
+        """Validate request args into a hashable, normalized query; raises ValueError"""
+        filters = []
+        for name in FILTER_PARAMS:
+            if args.get(name):
+                values = tuple(sorted({v.strip().lower() for v in args[name].split(',') if v.strip()}))
+                if values:
+                    filters.append((name, values))
+        
+        min_inefficiency = None
+        if args.get('min_inefficiency'):
+            try:
+                min_inefficiency = float(args['min_inefficiency'])
+            except ValueError:
+                raise ValueError('min_inefficiency must be a number')
+        
+        sort = args.get('sort') or 'inefficiency'
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        order = (args.get('order') or 'desc').lower()
+        if order not in ('asc', 'desc'):
+            raise ValueError('order must be asc or desc')
+        
+        try:
+            page_size = int(args.get('page_size') or DEFAULT_PAGE_SIZE)
+            page = int(args.get('page') or 1)
+        except ValueError:
+            raise ValueError('page and page_size must be integers')
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+        if page < 1:
+            raise ValueError('page must be at least 1')
+        
+        offset = self.decode_cursor(args['cursor']) if args.get('cursor') else (page - 1) * page_size
+        return (tuple(filters), min_inefficiency, sort, order, offset, page_size)
+    
+    def select(self, filters, min_inefficiency, sort, order):
+        """Matching row positions in the requested order"""
+        size = len(self.markets)
+        mask = None
+        
+        for name, values in filters:
+            postings = self.postings[name]
+            matched = np.zeros(size, dtype=bool)
+            matched[np.concatenate([postings.get(value, _NO_ROWS) for value in values])] = True
+            mask = matched if mask is None else mask & matched
+        
+        if min_inefficiency is not None:
+            # Scores >= threshold are a prefix of the descending score order
+            count = np.searchsorted(self._sorted_neg_scores, -min_inefficiency, side='right')
+            matched = np.zeros(size, dtype=bool)
+            matched[self.orders['inefficiency']['desc'][:count]] = True
+            mask = matched if mask is None else mask & matched
+        
+        rows = self.orders[sort][order]
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return rows
+    
+    def response(self, args):
+        """SerializedResponse for a query, reused while the same query is polled"""
+        query = self.parse(args)
+        
+        with self._lock:
+            cached = self._pages.get(query)
+            if cached is not None:
+                self._pages.move_to_end(query)
+                return cached
+        
+        filters, min_inefficiency, sort, order, offset, page_size = query
+        rows = self.select(filters, min_inefficiency, sort, order)
+        page_rows = rows[offset:offset + page_size]
+        next_offset = offset + len(page_rows)
+        
+        serialized = SerializedResponse({
+            'success': True,
+            'markets': self.markets.to_dicts(page_rows),
+            'cached': True,
+            'count': len(page_rows),
+            'total': len(rows),
+            'offset': offset,
+            'page_size': page_size,
+            'next_cursor': self.encode_cursor(next_offset) if next_offset < len(rows) else None,
+            'version': self.version,
+            'last_update': self.timestamp
+        })
+        
+        with self._lock:
+            self._pages[query] = serialized
+            while len(self._pages) > self.max_cached_pages:
+                self._pages.popitem(last=False)
+        return serialized
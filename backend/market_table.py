@@ -0,0 +1,175 @@
+import sys
+import numpy as np
+
+# Columns filled at ingestion
+RAW_FLOAT_COLUMNS = ('market_prob', 'liquidity', 'volume')
+RAW_STRING_COLUMNS = ('id', 'title', 'source', 'url', 'updated_at')
+
+# Columns filled by prediction, scoring and recommendation
+ENRICHED_FLOAT_COLUMNS = (
+    'ai_probability', 'inefficiency_score', 'news_sentiment', 'expected_roi', 'gap',
+    'crypto_sentiment', 'political_sentiment', 'weather_sentiment'  # Kept for replays, not served
+)
+ENRICHED_INT_COLUMNS = ('confidence',)
+ENRICHED_STRING_COLUMNS = ('score_label', 'score_color', 'action', 'direction', 'reasoning')
+
+FLOAT_COLUMNS = RAW_FLOAT_COLUMNS + ENRICHED_FLOAT_COLUMNS
+INT_COLUMNS = ENRICHED_INT_COLUMNS
+STRING_COLUMNS = RAW_STRING_COLUMNS + ENRICHED_STRING_COLUMNS
+
+# Low-cardinality strings are interned so every row shares one object
+INTERNED_COLUMNS = ('source', 'score_label', 'score_color', 'action', 'direction', 'reasoning')
+
+# Fields nested under 'recommendation' in the API's market dicts
+RECOMMENDATION_FIELDS = ('action', 'confidence', 'expected_roi', 'direction', 'gap')
+
+class MarketTable:
+    """
+    Columnar store for markets moving through the pipeline
+    Numeric columns are NumPy arrays and string columns are lists; dicts are
+    only built when a row has to leave the pipeline (JSON, portfolio, backtest)
+    """
+    
+    def __init__(self, columns=None):
+        columns = columns or {}
+        size = len(next(iter(columns.values()))) if columns else 0
+        
+        self.columns = {}
+        for name in FLOAT_COLUMNS:
+            values = columns.get(name)
+            self.columns[name] = np.full(size, np.nan) if values is None else np.asarray(values, dtype=np.float64)
+        for name in INT_COLUMNS:
+            values = columns.get(name)
+            self.columns[name] = np.zeros(size, dtype=np.int64) if values is None else np.asarray(values, dtype=np.int64)
+        for name in STRING_COLUMNS:
+            values = columns.get(name)
+            if values is None:
+                values = [''] * size
+            elif name in INTERNED_COLUMNS:
+                values = [sys.intern(v) for v in values]
+            else:
+                values = list(values)
+            self.columns[name] = values
+    
+    @classmethod
+    def from_markets(cls, markets):
+        """Build a table from normalized (and optionally enriched) market dicts"""
+        columns = {}
+        for name in RAW_FLOAT_COLUMNS:
+            columns[name] = [float(m.get(name) or 0) for m in markets]
+        for name in RAW_STRING_COLUMNS:
+            columns[name] = [str(m.get(name) or '') for m in markets]
+        
+        if markets and 'ai_probability' in markets[0]:
+            for name in ('ai_probability', 'inefficiency_score', 'news_sentiment'):
+                columns[name] = [m[name] for m in markets]
+            for name in ('crypto_sentiment', 'political_sentiment', 'weather_sentiment'):
+                columns[name] = [m.get(name, np.nan) for m in markets]
+            for name in ('score_label', 'score_color', 'reasoning'):
+                columns[name] = [m[name] for m in markets]
+            for name in RECOMMENDATION_FIELDS:
+                columns[name] = [m['recommendation'][name] for m in markets]
+        
+        return cls(columns)
+    
+    @classmethod
+    def concat(cls, tables):
+        """Stack tables row-wise"""
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls()
+        
+        columns = {}
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            columns[name] = np.concatenate([t.columns[name] for t in tables])
+        for name in STRING_COLUMNS:
+            columns[name] = [v for t in tables for v in t.columns[name]]
+        return cls(columns)
+    
+    def __len__(self):
+        return len(self.columns['id'])
+    
+    def column(self, name):
+        """A whole column (NumPy array for numbers, list for strings)"""
+        return self.columns[name]
+    
+    def set_column(self, name, values, rows=None):
+        """Overwrite a column, or only the given row positions of it"""
+        if rows is None:
+            if name in INTERNED_COLUMNS:
+                values = [sys.intern(v) for v in values]
+            self.columns[name] = values if name in STRING_COLUMNS else np.asarray(values, dtype=self.columns[name].dtype)
+            return
+        
+        column = self.columns[name]
+        if name in STRING_COLUMNS:
+            for row, value in zip(rows, values):
+                column[row] = sys.intern(value) if name in INTERNED_COLUMNS else value
+        else:
+            column[np.asarray(rows, dtype=np.intp)] = values
+    
+    def keys(self):
+        """Stable market identity per row: (source, id), falling back to the title"""
+        return [
+            (source, market_id or title)
+            for source, market_id, title in zip(self.columns['source'], self.columns['id'], self.columns['title'])
+        ]
+    
+    def take(self, indices):
+        """New table with the given rows, in the given order"""
+        indices = np.asarray(indices, dtype=np.intp)
+        positions = indices.tolist()
+        
+        columns = {}
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            columns[name] = self.columns[name][indices]
+        for name in STRING_COLUMNS:
+            column = self.columns[name]
+            columns[name] = [column[i] for i in positions]
+        return MarketTable(columns)
+    
+    def raw_market(self, i):
+        """Normalized market dict for one row (the shape ingestion produces)"""
+        market = {name: self.columns[name][i] for name in RAW_STRING_COLUMNS}
+        for name in RAW_FLOAT_COLUMNS:
+            market[name] = float(self.columns[name][i])
+        return market
+    
+    def row(self, i):
+        """Processed market dict for one row, as served by the API"""
+        return self.to_dicts([i])[0]
+    
+    def to_dicts(self, indices=None):
+        """Processed market dicts for the given rows (all rows by default)"""
+        if indices is None:
+            indices = np.arange(len(self))
+        indices = np.asarray(indices, dtype=np.intp)
+        positions = indices.tolist()
+        
+        values = {}
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            values[name] = self.columns[name][indices].tolist()
+        for name in STRING_COLUMNS:
+            column = self.columns[name]
+            values[name] = [column[i] for i in positions]
+        
+        markets = []
+        for k in range(len(positions)):
+            markets.append({
+                'id': values['id'][k],
+                'title': values['title'][k],
+                'source': values['source'][k],
+                'market_prob': values['market_prob'][k],
+                'liquidity': values['liquidity'][k],
+                'volume': values['volume'][k],
+                'updated_at': values['updated_at'][k],
+                'url': values['url'][k],
+                'ai_probability': values['ai_probability'][k],
+                'inefficiency_score': values['inefficiency_score'][k],
+                'score_label': values['score_label'][k],
+                'score_color': values['score_color'][k],
+                'recommendation': {name: values[name][k] for name in RECOMMENDATION_FIELDS},
+                'reasoning': values['reasoning'][k],
+                'news_sentiment': values['news_sentiment'][k]
+            })
+        return markets
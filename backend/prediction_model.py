@@ -2,12 +2,47 @@ import requests
 import os
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from dotenv import load_dotenv
+from signal_cache import TTLCache
+from sentiment_store import ArticleSentimentStore
+from rate_limiter import HostLimiter
+from keyword_classifier import keyword_classifier
+import numpy as np
 import re
 import random
 from datetime import datetime
 
 load_dotenv()
 
+COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin,ethereum&vs_currencies=usd&include_24h_change=true"
+WEATHER_URL = "https://api.open-meteo.com/v1/forecast?latitude=40.7128&longitude=-74.0060&hourly=temperature_2m,precipitation_probability&forecast_days=3"
+SIGNAL_CACHE_TTL = 300  # Seconds an external signal response is reused across markets
+NEWS_CACHE_TTL = 900  # News for a query doesn't change meaningfully within minutes
+NEWS_CACHE_MAX_ENTRIES = 5000
+
+# Weight of each signal in the sentiment adjustment
+SIGNAL_WEIGHTS = {
+    'news': 0.15,
+    'crypto': 0.1,
+    'political': 0.05,
+    'weather': 0.08
+}
+
+# Every reasoning text _generate_reasoning can return (the snapshot store keeps them as codes)
+REASONING = {
+    'strong_bullish': "Strong positive sentiment detected across multiple news sources with bullish market indicators. Analysis shows the crowd may be underestimating probability due to low information flow and limited liquidity allowing for mispricing.",
+    'strong_bearish': "Market sentiment analysis reveals overconfidence relative to underlying fundamentals. Cross-referencing external data sources suggests mean reversion likely as new information becomes priced in by rational traders.",
+    'efficient': "Market is efficiently priced. No clear signal detected.",
+    'modest_bullish': "Modest positive momentum building in recent headlines. Low liquidity suggests market hasn't fully priced in developing trends.",
+    'modest_bearish': "Sentiment turning cautious based on current data. Market may be slightly ahead of fundamentals."
+}
+
+# Per-host (max concurrent requests, requests per second) for concurrent enrichment
+HOST_LIMITS = {
+    'newsapi.org': (4, 5),
+    'api.coingecko.com': (2, 0.5),  # Demo plan allows ~30 calls/minute
+    'api.open-meteo.com': (2, 5)
+}
+
 class PredictionModel:
     """AI model to estimate real-world probabilities"""
     
@@ -15,7 +50,24 @@ class PredictionModel:
         self.sentiment_analyzer = SentimentIntensityAnalyzer()
         self.news_api_key = os.getenv('NEWS_API_KEY')
         self.coingecko_key = os.getenv('COINGECKO_API_KEY')
+        self.host_limiter = HostLimiter(HOST_LIMITS)
+        self.rng = np.random.default_rng()  # Noise source for the combiner; pass a seed to reproduce runs
+        # Shared by every market in a refresh: each upstream URL is fetched once per window
+        self.signal_cache = TTLCache(ttl=SIGNAL_CACHE_TTL)
+        # Article-level VADER scores, shared across markets and refreshes
+        self.article_sentiments = ArticleSentimentStore(self.sentiment_analyzer)
+        # News sentiment keyed by normalized keyword query; set NEWS_CACHE_PATH to survive restarts
+        self.news_cache = TTLCache(
+            ttl=NEWS_CACHE_TTL,
+            max_entries=NEWS_CACHE_MAX_ENTRIES,
+            persist_path=os.getenv('NEWS_CACHE_PATH')
+        )
         
+    def _http_get(self, url, **kwargs):
+        """GET through the per-host concurrency and rate limits (safe to call from many threads)"""
+        with self.host_limiter.limit(url):
+            return requests.get(url, **kwargs)
+    
     def extract_keywords(self, title):
         """Extract key topics from market title"""
         # Remove common prediction market words
@@ -24,77 +76,113 @@ class PredictionModel:
         keywords = [w for w in words if w not in stop_words and len(w) > 3]
         return keywords[:5]  # Top 5 keywords
     
+    def news_query(self, keywords):
+        """Normalized NewsAPI query for the top 3 keywords (order-insensitive)"""
+        return ' OR '.join(sorted({k.lower() for k in keywords[:3]}))
+    
     def fetch_news_sentiment(self, keywords):
         """Fetch news and calculate sentiment"""
         if not keywords:
             return 0.0
             
         try:
-            query = ' OR '.join(keywords[:3])  # Use top 3 keywords
-            url = f"https://newsapi.org/v2/everything?q={query}&apiKey={self.news_api_key}&pageSize=10&sortBy=publishedAt"
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                articles = response.json().get('articles', [])
-                sentiments = []
-                
-                for article in articles[:10]:  # Limit to 10 articles
-                    text = f"{article.get('title', '')} {article.get('description', '')}"
-                    if text.strip():
-                        score = self.sentiment_analyzer.polarity_scores(text)
-                        sentiments.append(score['compound'])
-                
-                if sentiments:
-                    avg_sentiment = sum(sentiments) / len(sentiments)
-                    return avg_sentiment
-            return 0.0
+            query = self.news_query(keywords)
+            sentiment = self.news_cache.get_or_fetch(query, lambda: self._fetch_news_sentiment(query))
+            return sentiment if sentiment is not None else 0.0
         except Exception as e:
             print(f"News sentiment error: {e}")
             return 0.0
     
-    def get_crypto_sentiment(self, title):
-        """Special handling for crypto markets"""
-        crypto_keywords = ['bitcoin', 'btc', 'ethereum', 'eth', 'crypto', 'cryptocurrency']
-        if any(keyword in title.lower() for keyword in crypto_keywords):
+    def _fetch_news_sentiment(self, query):
+        """Average VADER compound score over the latest articles for a query (None on API failure)"""
+        url = f"https://newsapi.org/v2/everything?q={query}&apiKey={self.news_api_key}&pageSize=10&sortBy=publishedAt"
+        response = self._http_get(url, timeout=5)
+        
+        if response.status_code == 200:
+            articles = response.json().get('articles', [])
+            texts = []
+            
+            for article in articles[:10]:  # Limit to 10 articles
+                text = f"{article.get('title', '')} {article.get('description', '')}"
+                if text.strip():
+                    texts.append(text)
+            
+            # Articles already scored under another query are not re-scored
+            sentiments = self.article_sentiments.score_batch(texts)
+            
+            if sentiments:
+                avg_sentiment = sum(sentiments) / len(sentiments)
+                return avg_sentiment
+            return 0.0
+        return None
+    
+    def save_caches(self):
+        """Persist caches that have a path configured"""
+        self.news_cache.save()
+    
+    def cache_stats(self):
+        """Hit/miss counters for the external data caches"""
+        return {
+            'signals': self.signal_cache.stats(),
+            'news': self.news_cache.stats(),
+            'articles': self.article_sentiments.stats()
+        }
+    
+    def _fetch_crypto_change(self):
+        """Average 24h BTC/ETH price change in percent, or None if unavailable"""
+        headers = {"x-cg-demo-api-key": self.coingecko_key}
+        response = self._http_get(COINGECKO_URL, headers=headers, timeout=5)
+        
+        if response.status_code == 200:
+            data = response.json()
+            btc_change = data.get('bitcoin', {}).get('usd_24h_change', 0)
+            eth_change = data.get('ethereum', {}).get('usd_24h_change', 0)
+            return (btc_change + eth_change) / 2
+        return None
+    
+    def get_crypto_sentiment(self, title, tags=None):
+        """Special handling for crypto markets (tags from keyword_classifier, computed if not given)"""
+        if tags is None:
+            tags = keyword_classifier.classify(title)
+        if 'crypto_signal' in tags:
             try:
                 # Check if crypto is trending up
-                url = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin,ethereum&vs_currencies=usd&include_24h_change=true"
-                headers = {"x-cg-demo-api-key": self.coingecko_key}
-                response = requests.get(url, headers=headers, timeout=5)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    btc_change = data.get('bitcoin', {}).get('usd_24h_change', 0)
-                    eth_change = data.get('ethereum', {}).get('usd_24h_change', 0)
-                    avg_change = (btc_change + eth_change) / 2
+                avg_change = self.signal_cache.get_or_fetch(COINGECKO_URL, self._fetch_crypto_change)
+                if avg_change is not None:
                     return avg_change / 100  # Normalize to -1 to 1
             except Exception as e:
                 print(f"Crypto sentiment error: {e}")
         return 0.0
     
-    def get_political_sentiment(self, title):
+    def get_political_sentiment(self, title, tags=None):
         """Special handling for political markets"""
-        political_keywords = ['trump', 'biden', 'election', 'president', 'political', 'congress']
-        if any(keyword in title.lower() for keyword in political_keywords):
+        if tags is None:
+            tags = keyword_classifier.classify(title)
+        if 'political_signal' in tags:
             # Simulate polling data influence (in real version, fetch from FiveThirtyEight)
             return random.uniform(-0.1, 0.1)
         return 0.0
     
-    def get_weather_sentiment(self, title):
+    def _fetch_precipitation(self):
+        """Average precipitation probability (0-100) over the next 24h, or None if unavailable"""
+        # NYC weather as default (can be expanded)
+        response = self._http_get(WEATHER_URL, timeout=5)
+        
+        if response.status_code == 200:
+            data = response.json()
+            # Get average precipitation probability
+            precip_probs = data.get('hourly', {}).get('precipitation_probability', [0])
+            return sum(precip_probs[:24]) / len(precip_probs[:24]) if precip_probs else 0
+        return None
+    
+    def get_weather_sentiment(self, title, tags=None):
         """Special handling for weather markets"""
-        weather_keywords = ['rain', 'snow', 'temperature', 'weather', 'storm', 'hurricane']
-        if any(keyword in title.lower() for keyword in weather_keywords):
+        if tags is None:
+            tags = keyword_classifier.classify(title)
+        if 'weather_signal' in tags:
             try:
-                # NYC weather as default (can be expanded)
-                url = "https://api.open-meteo.com/v1/forecast?latitude=40.7128&longitude=-74.0060&hourly=temperature_2m,precipitation_probability&forecast_days=3"
-                response = requests.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    # Get average precipitation probability
-                    precip_probs = data.get('hourly', {}).get('precipitation_probability', [0])
-                    avg_precip = sum(precip_probs[:24]) / len(precip_probs[:24]) if precip_probs else 0
-                    
+                avg_precip = self.signal_cache.get_or_fetch(WEATHER_URL, self._fetch_precipitation)
+                if avg_precip is not None:
                     # Convert to sentiment (-1 to 1 scale)
                     # High rain probability = negative for "no rain" markets
                     return (avg_precip / 100) * (1 if 'rain' in title.lower() else -1)
@@ -102,55 +190,99 @@ class PredictionModel:
                 print(f"Weather sentiment error: {e}")
         return 0.0
     
-    def estimate_probability(self, market):
-        """Estimate real-world probability for a market"""
+    def gather_signals(self, market):
+        """Fetch every external signal for a market (the I/O half of estimate_probability)"""
         title = market['title']
         keywords = self.extract_keywords(title)
+        tags = keyword_classifier.classify_market(market)  # One scan shared by every special-case signal
         
-        # Base probability starts at market price
-        base_prob = market['market_prob']
+        return {
+            'news_sentiment': self.fetch_news_sentiment(keywords),
+            'crypto_sentiment': self.get_crypto_sentiment(title, tags),
+            'political_sentiment': self.get_political_sentiment(title, tags),
+            'weather_sentiment': self.get_weather_sentiment(title, tags)
+        }
+    
+    def combine_signals_batch(self, base_probs, news, crypto, political, weather, liquidities, rng=None, weights=None):
+        """
+        Combine pre-fetched signal columns into AI probabilities in one NumPy pass
+        rng may be a seed or a numpy Generator; weights overrides SIGNAL_WEIGHTS
+        Returns (ai_probabilities, liquidity_factors), both unrounded
+        """
+        weights = {**SIGNAL_WEIGHTS, **(weights or {})}
+        if rng is None:
+            rng = self.rng
+        elif not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
         
-        # Get sentiment signals
-        news_sentiment = self.fetch_news_sentiment(keywords)
-        crypto_sentiment = self.get_crypto_sentiment(title)
-        political_sentiment = self.get_political_sentiment(title)
-        weather_sentiment = self.get_weather_sentiment(title)
+        base_probs = np.asarray(base_probs, dtype=np.float64)
+        liquidities = np.asarray(liquidities, dtype=np.float64)
         
         # Liquidity factor - lower liquidity = more room for inefficiency
-        liquidity = market.get('liquidity', 0)
-        liquidity_factor = 1.0 if liquidity < 10000 else 0.5
+        liquidity_factors = np.where(liquidities < 10000, 1.0, 0.5)
         
         # Weighted sentiment adjustment
-        sentiment_adjustment = (
-            (news_sentiment * 0.15) + 
-            (crypto_sentiment * 0.1) + 
-            (political_sentiment * 0.05) +
-            (weather_sentiment * 0.08)
-        ) * liquidity_factor
+        sentiment_adjustments = (
+            (np.asarray(news, dtype=np.float64) * weights['news']) +
+            (np.asarray(crypto, dtype=np.float64) * weights['crypto']) +
+            (np.asarray(political, dtype=np.float64) * weights['political']) +
+            (np.asarray(weather, dtype=np.float64) * weights['weather'])
+        ) * liquidity_factors
         
         # Add some randomness to simulate uncertainty (smaller for demo)
-        random_noise = random.uniform(-0.08, 0.08)
-        
-        # Calculate final probability
-        ai_prob = base_prob + sentiment_adjustment + random_noise
+        random_noise = rng.uniform(-0.08, 0.08, size=base_probs.shape)
         
         # Clamp between 0.05 and 0.95
-        ai_prob = max(0.05, min(0.95, ai_prob))
+        ai_probs = np.clip(base_probs + sentiment_adjustments + random_noise, 0.05, 0.95)
         
-        # Add reasoning
+        return ai_probs, liquidity_factors
+    
+    def build_prediction(self, market, signals, ai_prob, liquidity_factor):
+        """Assemble the prediction dict (with reasoning) for one market"""
         reasoning = self._generate_reasoning(
-            market, news_sentiment, crypto_sentiment, 
-            political_sentiment, ai_prob, liquidity_factor, weather_sentiment
+            market, signals['news_sentiment'], signals['crypto_sentiment'],
+            signals['political_sentiment'], ai_prob, liquidity_factor, signals['weather_sentiment']
         )
         
         return {
             'ai_probability': round(ai_prob, 4),
-            'news_sentiment': round(news_sentiment, 3),
-            'crypto_sentiment': round(crypto_sentiment, 3),
-            'weather_sentiment': round(weather_sentiment, 3),
+            'news_sentiment': round(signals['news_sentiment'], 3),
+            'crypto_sentiment': round(signals['crypto_sentiment'], 3),
+            'political_sentiment': round(signals['political_sentiment'], 3),
+            'weather_sentiment': round(signals['weather_sentiment'], 3),
             'reasoning': reasoning
         }
     
+    def estimate_probabilities(self, markets, signals, rng=None, weights=None):
+        """
+        Batch estimate_probability over markets whose signals were already gathered
+        Touches no network, so it can be re-run over cached signals (e.g. when re-weighting)
+        """
+        if not markets:
+            return []
+        
+        ai_probs, liquidity_factors = self.combine_signals_batch(
+            [m['market_prob'] for m in markets],
+            [s['news_sentiment'] for s in signals],
+            [s['crypto_sentiment'] for s in signals],
+            [s['political_sentiment'] for s in signals],
+            [s['weather_sentiment'] for s in signals],
+            [m.get('liquidity', 0) for m in markets],
+            rng=rng,
+            weights=weights
+        )
+        
+        return [
+            self.build_prediction(market, market_signals, ai_prob, liquidity_factor)
+            for market, market_signals, ai_prob, liquidity_factor
+            in zip(markets, signals, ai_probs.tolist(), liquidity_factors.tolist())
+        ]
+    
+    def estimate_probability(self, market):
+        """Estimate real-world probability for a market"""
+        signals = self.gather_signals(market)
+        return self.estimate_probabilities([market], [signals])[0]
+    
     def _generate_reasoning(self, market, news_sent, crypto_sent, pol_sent, ai_prob, liq_factor, weather_sent=0):
         """Generate human-readable reasoning - DEMO ENHANCED"""
         market_prob = market['market_prob']
@@ -161,15 +293,15 @@ class PredictionModel:
         # DEMO: Make reasoning more impressive
         if abs(diff) > 0.08:
             if diff > 0:
-                return "Strong positive sentiment detected across multiple news sources with bullish market indicators. Analysis shows the crowd may be underestimating probability due to low information flow and limited liquidity allowing for mispricing."
+                return REASONING['strong_bullish']
             else:
-                return "Market sentiment analysis reveals overconfidence relative to underlying fundamentals. Cross-referencing external data sources suggests mean reversion likely as new information becomes priced in by rational traders."
+                return REASONING['strong_bearish']
         
         if abs(diff) < 0.05:
-            return "Market is efficiently priced. No clear signal detected."
+            return REASONING['efficient']
         
         # Medium signals
         if diff > 0:
-            return "Modest positive momentum building in recent headlines. Low liquidity suggests market hasn't fully priced in developing trends."
+            return REASONING['modest_bullish']
         else:
-            return "Sentiment turning cautious based on current data. Market may be slightly ahead of fundamentals."
+            return REASONING['modest_bearish']
@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right, insort
+import threading
+
+class RankingIndex:
+    """
+    Keys ordered by score (highest first) with incremental updates
+    Entries are kept in a sorted list of (-score, key), so top-K is a slice and
+    threshold queries are a binary search; changing one key's score moves one entry
+    """
+    
+    def __init__(self):
+        self._entries = []  # Sorted (-score, key) pairs
+        self._scores = {}  # key -> score
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._scores)
+    
+    def __contains__(self, key):
+        return key in self._scores
+    
+    def score(self, key):
+        """Current score for key, or None"""
+        return self._scores.get(key)
+    
+    def update(self, key, score):
+        """Insert key or move it to its new score"""
+        with self._lock:
+            self._update(key, score)
+    
+    def update_many(self, items):
+        """Apply (key, score) updates; rebuilds in one sort when most entries change"""
+        with self._lock:
+            # Unchanged scores are no-ops, so they don't count towards a rebuild
+            items = [(key, score) for key, score in items if self._scores.get(key) != score]
+            if len(items) > len(self._scores) // 2:
+                for key, score in items:
+                    self._scores[key] = score
+                self._entries = sorted((-score, key) for key, score in self._scores.items())
+            else:
+                for key, score in items:
+                    self._update(key, score)
+    
+    def _update(self, key, score):
+        """Move one entry (lock held)"""
+        old_score = self._scores.get(key)
+        if old_score == score:
+            return
+        if old_score is not None:
+            self._remove_entry(key, old_score)
+        self._scores[key] = score
+        insort(self._entries, (-score, key))
+    
+    def remove(self, key):
+        """Drop key from the index if present"""
+        with self._lock:
+            score = self._scores.pop(key, None)
+            if score is not None:
+                self._remove_entry(key, score)
+    
+    def retain(self, keys):
+        """Drop every key not in keys"""
+        keys = set(keys)
+        with self._lock:
+            stale = [key for key in self._scores if key not in keys]
+            if len(stale) > len(self._scores) // 2:
+                for key in stale:
+                    del self._scores[key]
+                self._entries = sorted((-score, key) for key, score in self._scores.items())
+            else:
+                for key in stale:
+                    self._remove_entry(key, self._scores.pop(key))
+    
+    def _remove_entry(self, key, score):
+        """Remove one (-score, key) entry from the sorted list (lock held)"""
+        position = bisect_left(self._entries, (-score, key))
+        if position < len(self._entries) and self._entries[position] == (-score, key):
+            del self._entries[position]
+    
+    def top_k(self, k):
+        """The k highest-scoring (key, score) pairs, highest first"""
+        with self._lock:
+            return [(key, -neg_score) for neg_score, key in self._entries[:k]]
+    
+    def at_least(self, threshold, limit=None):
+        """(key, score) pairs with score >= threshold, highest first, up to limit"""
+        with self._lock:
+            # Entries are sorted by -score, so score >= threshold is the prefix with -score <= -threshold
+            end = bisect_right(self._entries, (-threshold, _MAX_KEY))
+            if limit is not None:
+                end = min(end, limit)
+            return [(key, -neg_score) for neg_score, key in self._entries[:end]]
+    
+    def count_at_least(self, threshold):
+        """Number of keys with score >= threshold"""
+        with self._lock:
+            return bisect_right(self._entries, (-threshold, _MAX_KEY))
+    
+    def keys(self):
+        """All keys, highest score first"""
+        with self._lock:
+            return [key for _, key in self._entries]
+
+class _MaxKey:
+    """Sorts after every key, so bisect_right includes all entries tied on score"""
+    
+    def __lt__(self, other):
+        return False
+    
+    def __gt__(self, other):
+        return True
+    
+    def __eq__(self, other):
+        return isinstance(other, _MaxKey)
+
+_MAX_KEY = _MaxKey()
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import threading
+import time
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` requests per second with bursts up to `capacity`"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+class HostLimiter:
+    """Per-host concurrency cap and rate limit for outbound HTTP calls"""
+    
+    def __init__(self, limits=None, default_concurrency=4, default_rate=10):
+        self.limits = limits or {}  # host -> (max concurrent requests, requests per second)
+        self.default_concurrency = default_concurrency
+        self.default_rate = default_rate
+        self._hosts = {}  # host -> (semaphore, bucket)
+        self._lock = threading.Lock()
+    
+    def _host_state(self, host):
+        """Semaphore and bucket for a host, created on first use"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                concurrency, rate = self.limits.get(host, (self.default_concurrency, self.default_rate))
+                state = (threading.BoundedSemaphore(concurrency), TokenBucket(rate))
+                self._hosts[host] = state
+            return state
+    
+    @contextmanager
+    def limit(self, url):
+        """Hold a slot for the URL's host for the duration of the request"""
+        semaphore, bucket = self._host_state(urlparse(url).hostname)
+        bucket.acquire()
+        with semaphore:
+            yield
@@ -1,3 +1,5 @@
+import numpy as np
+
 class RecommendationEngine:
     """Generate trading recommendations"""
     
@@ -33,3 +35,32 @@ class RecommendationEngine:
             'direction': direction,
             'gap': round(prob_diff * 100, 2)  # Gap in percentage points
         }
+    
+    def generate_recommendation_batch(self, market_probs, ai_probs, inefficiency_scores):
+        """
+        Vectorized generate_recommendation
+        Returns a dict of columns (action, confidence, expected_roi, direction, gap)
+        """
+        market_probs = np.asarray(market_probs, dtype=np.float64)
+        ai_probs = np.asarray(ai_probs, dtype=np.float64)
+        inefficiency_scores = np.asarray(inefficiency_scores, dtype=np.float64)
+        prob_diff = ai_probs - market_probs
+        
+        bullish = prob_diff > 0.1
+        bearish = prob_diff < -0.1
+        action = np.where(bullish, "BUY YES", np.where(bearish, "SELL NO", "HOLD"))
+        direction = np.where(bullish, "bullish", np.where(bearish, "bearish", "neutral"))
+        
+        # Calculate confidence (0-100); truncation matches int() for these non-negative values
+        raw_confidence = np.abs(prob_diff) * 100 + inefficiency_scores * 50
+        confidence = np.minimum(100, np.trunc(raw_confidence).astype(np.int64))
+        
+        expected_roi = np.where(bullish | bearish, np.round(np.abs(prob_diff) * 100, 2), 0.0)
+        
+        return {
+            'action': action,
+            'confidence': confidence,
+            'expected_roi': expected_roi,
+            'direction': direction,
+            'gap': np.round(prob_diff * 100, 2)
+        }
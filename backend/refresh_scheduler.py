@@ -0,0 +1,75 @@
+import threading
+import time
+
+class RefreshScheduler:
+    """Runs market refreshes in the background with single-flight deduplication"""
+    
+    def __init__(self, refresh_fn, interval=60):
+        self.refresh_fn = refresh_fn
+        self.interval = interval
+        self.last_success = 0
+        self.last_error = None
+        self.refresh_count = 0
+        self._lock = threading.Lock()
+        self._in_flight = None  # Event set when the running refresh finishes
+        self._worker = None
+        self._stop = threading.Event()
+    
+    def trigger(self, wait=False, timeout=None):
+        """
+        Start a refresh unless one is already running
+        Concurrent callers join the in-flight refresh instead of starting their own
+        Returns True if the refresh finished (always True when not waiting)
+        """
+        with self._lock:
+            flight = self._in_flight
+            if flight is None:
+                flight = threading.Event()
+                self._in_flight = flight
+                threading.Thread(
+                    target=self._run, args=(flight,), name='market-refresh', daemon=True
+                ).start()
+        
+        if wait:
+            return flight.wait(timeout)
+        return True
+    
+    def is_refreshing(self):
+        """Whether a refresh is currently running"""
+        return self._in_flight is not None
+    
+    def _run(self, flight):
+        """Execute one refresh and release any waiting callers"""
+        start = time.time()
+        try:
+            self.refresh_fn()
+            self.last_success = time.time()
+            self.last_error = None
+            self.refresh_count += 1
+            print(f"⏱️ Background refresh finished in {self.last_success - start:.2f}s")
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error in background refresh: {e}")
+        finally:
+            with self._lock:
+                self._in_flight = None
+            flight.set()
+    
+    def start(self):
+        """Start the periodic refresh worker (idempotent, safe to call from concurrent requests)"""
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._loop, name='refresh-scheduler', daemon=True)
+            self._worker.start()
+    
+    def stop(self):
+        """Stop the periodic refresh worker after the current cycle"""
+        self._stop.set()
+    
+    def _loop(self):
+        """Refresh immediately, then every `interval` seconds"""
+        while not self._stop.is_set():
+            self.trigger(wait=True)
+            self._stop.wait(self.interval)
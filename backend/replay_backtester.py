@@ -0,0 +1,268 @@
+from collections import deque
+from datetime import datetime
+import numpy as np
+from backtesting import DEFAULT_PARAMS
+
+# Signals assumed for a market recorded without them when assume_neutral_signals is set
+NEUTRAL_SIGNALS = {
+    'news_sentiment': 0.0,
+    'crypto_sentiment': 0.0,
+    'political_sentiment': 0.0,
+    'weather_sentiment': 0.0
+}
+
+class ReplayBacktester:
+    """
+    Event-driven backtest over recorded market snapshots
+    Each tick runs the live decision path (ScoringEngine, RecommendationEngine) on the
+    recorded AI probabilities, so it reproduces what the live model decided; with
+    recompute=True the PredictionModel combiner is re-run over the recorded signals
+    instead (e.g. to try other weights). Positions are settled against later recorded
+    prices. Ticks are processed as they stream in and only open positions and running
+    totals are kept, so memory doesn't grow with history
+    """
+    
+    def __init__(self, prediction_model, scoring_engine, recommendation_engine, params=None,
+                 signal_fn=None, recompute=False, weights=None, assume_neutral_signals=False,
+                 max_hold_seconds=86400, max_new_trades_per_tick=3,
+                 max_open_positions=20, curve_interval=3600, seed=0):
+        self.prediction_model = prediction_model
+        self.scoring_engine = scoring_engine
+        self.recommendation_engine = recommendation_engine
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.signal_fn = signal_fn  # e.g. prediction_model.gather_signals to refetch live signals (implies recompute)
+        self.recompute = recompute or signal_fn is not None
+        self.weights = weights  # SIGNAL_WEIGHTS overrides when recomputing
+        # Markets recorded without signals are held unless this treats their missing signals as 0
+        self.assume_neutral_signals = assume_neutral_signals
+        self.max_hold_seconds = max_hold_seconds
+        self.max_new_trades_per_tick = max_new_trades_per_tick
+        self.max_open_positions = max_open_positions
+        self.curve_interval = curve_interval  # Seconds between equity curve points
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+    
+    def reset(self, initial_capital=1000):
+        """Clear positions and statistics"""
+        self.initial_capital = initial_capital
+        self.capital = initial_capital
+        self.peak_capital = initial_capital
+        self.max_drawdown = 0.0
+        self.positions = {}  # market key -> open position
+        self.ticks = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.total_trades = 0
+        self.wins = 0
+        self.total_profit = 0.0
+        self.total_staked = 0.0
+        self.exit_reasons = {}
+        self.recent_trades = deque(maxlen=20)
+        self.cumulative_data = []
+        self._next_curve_point = None
+    
+    def run(self, store, start=None, end=None, market_ids=None):
+        """Replay a SnapshotStore from start to end and return the results"""
+        return self.run_ticks(store.iter_ticks(start, end, market_ids))
+    
+    def run_ticks(self, ticks):
+        """Replay any stream of (timestamp, markets) ticks"""
+        self.reset(self.initial_capital)
+        for timestamp, markets in ticks:
+            self.on_tick(timestamp, markets)
+        self.close_all('end_of_replay')
+        return self.get_results()
+    
+    def on_tick(self, timestamp, markets):
+        """Process one recorded snapshot: settle what's due, then act on new signals"""
+        self.ticks += 1
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+        
+        keys = [(m.get('source'), m.get('id') or m['title']) for m in markets]
+        prices = np.array([float(m.get('market_prob') or 0) for m in markets], dtype=np.float64)
+        
+        # Mark open positions to the latest recorded prices
+        for key, price in zip(keys, prices.tolist()):
+            position = self.positions.get(key)
+            if position is not None:
+                position['last_price'] = price
+        
+        actions, scores, ai_probs = self._decide(markets, prices)
+        decisions = {key: k for k, key in enumerate(keys)}
+        
+        self._settle_due(timestamp, actions, decisions)
+        self._open_positions(timestamp, markets, keys, prices, actions, scores, ai_probs)
+        self._record_curve(timestamp)
+    
+    def _decide(self, markets, prices):
+        """Live decision path over one tick's markets, as whole columns"""
+        if not markets:
+            empty = np.zeros(0)
+            return np.zeros(0, dtype='<U7'), empty, empty
+        
+        ai_probs = np.full(len(markets), np.nan)
+        if not self.recompute:
+            ai_probs[:] = [m['ai_probability'] if m.get('ai_probability') is not None else np.nan for m in markets]
+        
+        # Rows without a recorded probability are combined from their signals
+        pending = []
+        signals = []
+        for k in np.flatnonzero(np.isnan(ai_probs)).tolist():
+            market_signals = self.signal_fn(markets[k]) if self.signal_fn is not None else markets[k].get('signals')
+            if market_signals is None and self.assume_neutral_signals:
+                market_signals = NEUTRAL_SIGNALS
+            if market_signals is not None:
+                pending.append(k)
+                signals.append(market_signals)
+        
+        liquidities = np.array([float(m.get('liquidity') or 0) for m in markets], dtype=np.float64)
+        if pending:
+            combined, _ = self.prediction_model.combine_signals_batch(
+                prices[pending],
+                [s['news_sentiment'] for s in signals],
+                [s['crypto_sentiment'] for s in signals],
+                [s['political_sentiment'] for s in signals],
+                [s['weather_sentiment'] for s in signals],
+                liquidities[pending],
+                rng=self.rng,
+                weights=self.weights
+            )
+            ai_probs[pending] = np.round(combined, 4)
+        
+        # Markets with neither a probability nor signals can't be decided: hold them
+        decided = ~np.isnan(ai_probs)
+        safe_probs = np.where(decided, ai_probs, prices)
+        scores = self.scoring_engine.calculate_inefficiency_batch(prices, safe_probs, liquidities)
+        recommendations = self.recommendation_engine.generate_recommendation_batch(prices, safe_probs, scores)
+        actions = np.where(decided, recommendations['action'], 'HOLD')
+        return actions, np.where(decided, scores, 0.0), safe_probs
+    
+    def _settle_due(self, timestamp, actions, decisions):
+        """Close positions that resolved, timed out, or whose edge is gone"""
+        for key, position in list(self.positions.items()):
+            price = position['last_price']
+            k = decisions.get(key)
+            
+            if price >= 0.99 or price <= 0.01:
+                reason = 'resolved'
+            elif timestamp - position['opened_at'] >= self.max_hold_seconds:
+                reason = 'max_hold'
+            elif k is not None and actions[k] != position['action']:
+                reason = 'signal_changed'
+            else:
+                continue
+            self._close(key, timestamp, reason)
+    
+    def _open_positions(self, timestamp, markets, keys, prices, actions, scores, ai_probs):
+        """Open trades on the strongest new opportunities of this tick"""
+        slots = min(self.max_new_trades_per_tick, self.max_open_positions - len(self.positions))
+        if slots <= 0 or not len(scores):
+            return
+        
+        candidates = np.flatnonzero((scores >= self.params['min_inefficiency']) & (actions != 'HOLD'))
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        
+        for k in candidates.tolist():
+            if slots <= 0:
+                break
+            if keys[k] in self.positions:
+                continue
+            
+            price = float(prices[k])
+            self.positions[keys[k]] = {
+                'market_title': markets[k]['title'],
+                'action': str(actions[k]),
+                'entry_price': price,
+                'last_price': price,
+                'ai_estimate': float(ai_probs[k]),
+                'inefficiency_score': float(scores[k]),
+                'stake': self.params['stake'],
+                'opened_at': timestamp
+            }
+            slots -= 1
+    
+    def _close(self, key, timestamp, reason):
+        """Settle one position at its last recorded price"""
+        position = self.positions.pop(key)
+        entry = position['entry_price']
+        exit_price = position['last_price']
+        stake = position['stake']
+        
+        # BUY YES holds YES shares; SELL NO holds NO shares (priced at 1 - p)
+        if position['action'] == 'BUY YES':
+            entry_cost, exit_value = entry, exit_price
+        else:
+            entry_cost, exit_value = 1 - entry, 1 - exit_price
+        profit = stake * (exit_value / entry_cost - 1) if entry_cost > 0 else 0.0
+        
+        self.capital += profit
+        self.total_profit += profit
+        self.total_staked += stake
+        self.total_trades += 1
+        if profit > 0:
+            self.wins += 1
+        self.exit_reasons[reason] = self.exit_reasons.get(reason, 0) + 1
+        
+        self.peak_capital = max(self.peak_capital, self.capital)
+        self.max_drawdown = max(self.max_drawdown, (self.peak_capital - self.capital) / self.peak_capital)
+        
+        self.recent_trades.append({
+            'date': datetime.fromtimestamp(position['opened_at']).strftime('%Y-%m-%d %H:%M'),
+            'closed': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M'),
+            'market_title': position['market_title'][:50] + "...",
+            'action': position['action'],
+            'entry_price': entry,
+            'exit_price': exit_price,
+            'ai_estimate': position['ai_estimate'],
+            'inefficiency_score': position['inefficiency_score'],
+            'stake': stake,
+            'profit': round(profit, 2),
+            'roi_percent': round((profit / stake) * 100, 1),
+            'status': 'WIN' if profit > 0 else 'LOSS',
+            'exit_reason': reason,
+            'capital_after': round(self.capital, 2)
+        })
+    
+    def close_all(self, reason):
+        """Settle every open position at its last recorded price"""
+        for key in list(self.positions):
+            self._close(key, self.last_timestamp, reason)
+    
+    def _record_curve(self, timestamp):
+        """Sample realized capital at most once per curve_interval"""
+        if self._next_curve_point is not None and timestamp < self._next_curve_point:
+            return
+        self._next_curve_point = timestamp + self.curve_interval
+        self.cumulative_data.append({
+            'date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M'),
+            'capital': round(self.capital, 2),
+            'roi': round(((self.capital - self.initial_capital) / self.initial_capital) * 100, 2)
+        })
+    
+    def get_results(self):
+        """Summary in the same spirit as BacktestingEngine.run_backtest"""
+        losses = self.total_trades - self.wins
+        return {
+            'summary': {
+                'total_trades': self.total_trades,
+                'wins': self.wins,
+                'losses': losses,
+                'win_rate': round((self.wins / self.total_trades) * 100, 1) if self.total_trades else 0,
+                'total_profit': round(self.total_profit, 2),
+                'roi': round((self.total_profit / self.total_staked) * 100, 1) if self.total_staked else 0,
+                'final_capital': round(self.capital, 2),
+                'initial_capital': self.initial_capital,
+                'max_drawdown_percent': round(self.max_drawdown * 100, 2),
+                'ticks': self.ticks,
+                'start': self.first_timestamp,
+                'end': self.last_timestamp,
+                'open_positions': len(self.positions),
+                'recompute': self.recompute,
+                'exit_reasons': dict(self.exit_reasons),
+                'params': self.params
+            },
+            'cumulative_performance': self.cumulative_data,
+            'recent_trades': list(self.recent_trades)
+        }
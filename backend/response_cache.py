@@ -0,0 +1,117 @@
+from flask import Response, request
+import gzip
+import hashlib
+import json
+import threading
+import numpy as np
+
+# Optional faster encoder / better compressor; stdlib fallbacks are used when missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+MIN_COMPRESS_SIZE = 1024  # Smaller bodies aren't worth a compressed copy
+
+def _default(value):
+    """Serialize NumPy scalars/arrays that slipped into a payload"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload):
+    """Encode a payload to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+class SerializedResponse:
+    """
+    A JSON payload encoded once, with compressed copies kept alongside it
+    Built when a snapshot is published, so serving a request is picking the bytes
+    for the client's Accept-Encoding, or a 304 when its ETag is still current
+    """
+    
+    def __init__(self, payload=None, status=200, body=None):
+        self.status = status
+        self.body = body if body is not None else dumps(payload)  # body: already-encoded JSON bytes
+        
+        # Strong validator: the same snapshot always yields the same bytes
+        digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self.etags = {'identity': digest}
+        self.encoded = {'identity': self.body}
+        
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            # Each encoding is its own representation, so it gets its own ETag
+            if brotli is not None:
+                self.encoded['br'] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                self.etags['br'] = f"{digest}-br"
+            self.encoded['gzip'] = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+            self.etags['gzip'] = f"{digest}-gzip"
+    
+    def choose_encoding(self):
+        """Best available encoding the current request accepts"""
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and accepted[encoding]:
+                return encoding
+        return 'identity'
+    
+    def to_response(self, headers=None):
+        """Flask response for the current request, honouring If-None-Match"""
+        encoding = self.choose_encoding()
+        etag = self.etags[encoding]
+        
+        if self.status == 200 and any(tag in request.if_none_match for tag in self.etags.values()):
+            response = Response(status=304)
+        else:
+            response = Response(self.encoded[encoding], status=self.status, mimetype='application/json')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'  # Always revalidate; unchanged snapshots cost a 304
+        for name, value in (headers or {}).items():
+            response.headers[name] = str(value)
+        return response
+
+class SnapshotBundle:
+    """
+    Every dashboard view from one refresh generation, each section serialized once
+    A field selection is stitched from the section bytes (no re-encoding) and its
+    SerializedResponse is kept, so each combination is compressed at most once
+    """
+    
+    def __init__(self, sections, version, timestamp):
+        self.sections = {name: dumps(value) for name, value in sections.items()}
+        self._head = dumps({'success': True, 'version': version, 'timestamp': timestamp})[:-1]  # Without the closing brace
+        self._responses = {}  # Selected section names -> SerializedResponse
+        self._lock = threading.Lock()
+    
+    def response(self, fields=None):
+        """SerializedResponse with the requested sections (all by default); raises ValueError on unknown names"""
+        if fields is not None:
+            unknown = set(fields) - set(self.sections)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; available: {', '.join(self.sections)}")
+        selected = tuple(name for name in self.sections if fields is None or name in fields)
+        
+        with self._lock:
+            cached = self._responses.get(selected)
+        if cached is not None:
+            return cached
+        
+        body = self._head + b''.join(b',' + dumps(name) + b':' + self.sections[name] for name in selected) + b'}'
+        serialized = SerializedResponse(body=body)
+        with self._lock:
+            return self._responses.setdefault(selected, serialized)
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 class ScoringEngine:
     """Calculate inefficiency scores for markets"""
@@ -39,3 +40,30 @@ class ScoringEngine:
             return "red"    # Overpriced - avoid
         else:
             return "gray"   # Efficient
+    
+    def calculate_inefficiency_batch(self, market_probs, ai_probs, liquidities):
+        """Vectorized calculate_inefficiency over whole columns of markets"""
+        market_probs = np.asarray(market_probs, dtype=np.float64)
+        ai_probs = np.asarray(ai_probs, dtype=np.float64)
+        liquidities = np.asarray(liquidities, dtype=np.float64)
+        
+        prob_diff = np.abs(market_probs - ai_probs)
+        # log(1 + x) rather than log1p so results match the scalar version bit for bit
+        liquidity_weight = np.log(1 + liquidities) / 10
+        raw_scores = prob_diff * (1 + liquidity_weight)
+        
+        return np.round(np.minimum(1.0, raw_scores), 4)
+    
+    def get_score_label_batch(self, scores):
+        """Vectorized get_score_label"""
+        scores = np.asarray(scores, dtype=np.float64)
+        return np.where(scores >= 0.6, "High", np.where(scores >= 0.3, "Medium", "Low"))
+    
+    def get_score_color_batch(self, market_probs, ai_probs):
+        """Vectorized get_score_color"""
+        market_probs = np.asarray(market_probs, dtype=np.float64)
+        ai_probs = np.asarray(ai_probs, dtype=np.float64)
+        return np.where(
+            ai_probs > market_probs + 0.1, "green",
+            np.where(ai_probs < market_probs - 0.1, "red", "gray")
+        )
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import hashlib
+import threading
+
+class ArticleSentimentStore:
+    """
+    Memoized VADER compound scores keyed by a hash of the article text
+    The same article showing up under several markets' queries, or again on the
+    next refresh, is scored once
+    """
+    
+    def __init__(self, analyzer=None, max_entries=50000):
+        self.analyzer = analyzer or SentimentIntensityAnalyzer()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._scores = OrderedDict()  # content hash -> compound score, least recently used first
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def content_hash(text):
+        """Stable key for an article's text"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def score(self, text):
+        """Compound score for a single text"""
+        return self.score_batch([text])[0]
+    
+    def score_batch(self, texts):
+        """
+        Compound scores for a list of texts, in order
+        Only texts that haven't been seen before are run through VADER
+        """
+        keys = [self.content_hash(text) for text in texts]
+        
+        scores = {}
+        unseen = {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in self._scores:
+                    self.hits += 1
+                    self._scores.move_to_end(key)
+                    scores[key] = self._scores[key]
+                elif key not in unseen:
+                    self.misses += 1
+                    unseen[key] = text
+                else:
+                    self.hits += 1
+        
+        if unseen:
+            new_scores = dict(zip(unseen, self._score_texts(list(unseen.values()))))
+            scores.update(new_scores)
+            with self._lock:
+                self._scores.update(new_scores)
+                while len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+        
+        return [scores[key] for key in keys]
+    
+    def _score_texts(self, texts):
+        """Run VADER over texts"""
+        return [self.analyzer.polarity_scores(text)['compound'] for text in texts]
+    
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'entries': len(self._scores)
+            }
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+class _Flight:
+    """An upstream fetch in progress that other callers can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    """
+    Thread-safe TTL cache for upstream responses with request coalescing
+    Concurrent misses for the same key share one fetch instead of each calling upstream
+    Optionally bounded (least recently used entries are evicted) and persisted to disk
+    """
+    
+    def __init__(self, ttl=300, negative_ttl=30, max_entries=None, persist_path=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl  # Shorter lifetime for None (failed/empty) results
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._in_flight = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        
+        if persist_path:
+            self.load()
+    
+    def get_or_fetch(self, key, fetch_fn):
+        """Return the cached value for key, calling fetch_fn at most once per TTL window"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            
+            flight = self._in_flight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._in_flight[key] = flight
+                self.misses += 1
+            else:
+                self.hits += 1
+        
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = fetch_fn()
+            ttl = self.ttl if flight.value is not None else self.negative_ttl
+            with self._lock:
+                self._store(key, time.time() + ttl, flight.value)
+            return flight.value
+        except Exception as e:
+            # Errors are shared with waiting callers and cached as a failed (None) result,
+            # so an upstream outage costs one call per negative_ttl instead of one per market
+            flight.error = e
+            with self._lock:
+                self._store(key, time.time() + self.negative_ttl, None)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+    
+    def _store(self, key, expires_at, value):
+        """Insert an entry and evict least recently used ones over the bound (lock held)"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'evictions': self.evictions,
+                'entries': len(self._entries)
+            }
+    
+    def save(self):
+        """Write unexpired entries to persist_path (atomic replace)"""
+        if not self.persist_path:
+            return
+        
+        now = time.time()
+        with self._lock:
+            entries = [[key, expires_at, value] for key, (expires_at, value) in self._entries.items() if expires_at > now]
+        
+        try:
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"Error saving cache to {self.persist_path}: {e}")
+    
+    def load(self):
+        """Warm the cache from persist_path, skipping entries that expired meanwhile"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        
+        try:
+            with open(self.persist_path) as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading cache from {self.persist_path}: {e}")
+            return
+        
+        now = time.time()
+        with self._lock:
+            for key, expires_at, value in entries:
+                if expires_at > now:
+                    self._store(key, expires_at, value)
+        print(f"♻️ Restored {len(self._entries)} cache entries from {self.persist_path}")
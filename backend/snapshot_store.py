@@ -0,0 +1,300 @@
+from datetime import datetime, timezone
+import json
+import os
+import threading
+import numpy as np
+from market_table import MarketTable
+from prediction_model import REASONING
+
+# Per-row column files: float64 values, and int32 for the market dictionary index and codes
+FLOAT_FIELDS = (
+    'timestamp', 'market_prob', 'liquidity', 'volume',
+    'ai_probability', 'inefficiency_score', 'news_sentiment', 'expected_roi', 'gap',
+    'crypto_sentiment', 'political_sentiment', 'weather_sentiment'
+)
+INT_FIELDS = ('market', 'confidence', 'action', 'score_label', 'score_color', 'direction', 'reasoning')
+
+# Low-cardinality string columns are stored as int32 codes into these vocabularies (-1 = other)
+CODES = {
+    'action': ('HOLD', 'BUY YES', 'SELL NO'),
+    'score_label': ('Low', 'Medium', 'High'),
+    'score_color': ('gray', 'green', 'red'),
+    'direction': ('neutral', 'bullish', 'bearish'),
+    'reasoning': tuple(REASONING.values())
+}
+
+# Signal columns PredictionModel.gather_signals produced for each row
+SIGNAL_FIELDS = ('news_sentiment', 'crypto_sentiment', 'political_sentiment', 'weather_sentiment')
+
+# Market identity and text, stored once per market in the dictionary file
+DICTIONARY_FIELDS = ('source', 'id', 'title', 'url')
+
+def _file_name(field):
+    return f"{field}.f64" if field in FLOAT_FIELDS else f"{field}.i32"
+
+def _dtype(field):
+    return np.float64 if field in FLOAT_FIELDS else np.int32
+
+def _missing_value(field):
+    """Fill for a column a partition was written without (added to the store later)"""
+    return np.nan if field in FLOAT_FIELDS else -1
+
+class SnapshotStore:
+    """
+    Append-only columnar history of processed market snapshots
+    One row per market per snapshot, partitioned into a directory per UTC day with
+    one raw binary file per column. Reads memory-map the column files, so a time
+    range is a binary search on the timestamp column plus zero-copy slices.
+    Market identity lives in a shared dictionary (markets.jsonl) and rows store its index
+    """
+    
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._keys = {}  # (source, id) -> dictionary index
+        self._markets = []  # dictionary index -> {source, id, title, url}
+        self._last_timestamp = None
+        os.makedirs(root, exist_ok=True)
+        self._load_dictionary()
+    
+    @property
+    def dictionary_path(self):
+        return os.path.join(self.root, 'markets.jsonl')
+    
+    def _load_dictionary(self):
+        """Rebuild the market dictionary; later lines for an index update its title/url"""
+        if not os.path.exists(self.dictionary_path):
+            return
+        with open(self.dictionary_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from an interrupted append
+                index = entry.pop('index')
+                if index == len(self._markets):
+                    self._markets.append(entry)
+                elif index < len(self._markets):
+                    self._markets[index] = entry
+                self._keys[(entry['source'], entry['id'])] = index
+    
+    def _market_indices(self, table):
+        """Dictionary index per row, registering unseen markets (lock held)"""
+        new_entries = []
+        indices = np.empty(len(table), dtype=np.int32)
+        columns = {name: table.column(name) for name in DICTIONARY_FIELDS}
+        
+        for row, key in enumerate(table.keys()):
+            entry = {name: columns[name][row] for name in DICTIONARY_FIELDS}
+            entry['id'] = key[1]
+            index = self._keys.get(key)
+            if index is None:
+                index = len(self._markets)
+                self._keys[key] = index
+                self._markets.append(entry)
+                new_entries.append({'index': index, **entry})
+            elif self._markets[index] != entry:
+                self._markets[index] = entry
+                new_entries.append({'index': index, **entry})
+            indices[row] = index
+        
+        if new_entries:
+            with open(self.dictionary_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(entry) + '\n' for entry in new_entries))
+        return indices
+    
+    @staticmethod
+    def partition_name(timestamp):
+        """UTC day a timestamp belongs to"""
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+    
+    def partitions(self):
+        """Day partition names, oldest first"""
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name)) and len(name) == 10
+        )
+    
+    def append(self, table, timestamp):
+        """Append one snapshot (a MarketTable) taken at timestamp; timestamps must not go backwards"""
+        if not len(table):
+            return
+        
+        with self._lock:
+            if self._last_timestamp is None:
+                self._last_timestamp = self.latest_timestamp()
+            if self._last_timestamp is not None and timestamp < self._last_timestamp:
+                raise ValueError(f"Snapshot at {timestamp} is older than the last stored one ({self._last_timestamp})")
+            
+            columns = {
+                'timestamp': np.full(len(table), timestamp, dtype=np.float64),
+                'market': self._market_indices(table)
+            }
+            for field in FLOAT_FIELDS[1:]:
+                columns[field] = table.column(field)
+            columns['confidence'] = table.column('confidence')
+            for field, vocabulary in CODES.items():
+                lookup = {value: code for code, value in enumerate(vocabulary)}
+                columns[field] = [lookup.get(value, -1) for value in table.column(field)]
+            
+            directory = os.path.join(self.root, self.partition_name(timestamp))
+            os.makedirs(directory, exist_ok=True)
+            self._repair_partition(directory)
+            for field in FLOAT_FIELDS + INT_FIELDS:
+                with open(os.path.join(directory, _file_name(field)), 'ab') as f:
+                    f.write(np.asarray(columns[field], dtype=_dtype(field)).tobytes())
+            
+            self._last_timestamp = timestamp
+    
+    def _complete_rows(self, directory):
+        """Rows present in every column file of a partition (columns it has no file for are skipped)"""
+        sizes = []
+        for field in FLOAT_FIELDS + INT_FIELDS:
+            path = os.path.join(directory, _file_name(field))
+            if os.path.exists(path):
+                sizes.append(os.path.getsize(path) // np.dtype(_dtype(field)).itemsize)
+        return min(sizes, default=0)  # An interrupted append can leave some columns a few rows longer
+    
+    def _repair_partition(self, directory):
+        """
+        Cut torn rows off the column files so the next append stays aligned, and
+        backfill columns the partition was written without (lock held)
+        """
+        rows = self._complete_rows(directory)
+        for field in FLOAT_FIELDS + INT_FIELDS:
+            path = os.path.join(directory, _file_name(field))
+            size = rows * np.dtype(_dtype(field)).itemsize
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(np.full(rows, _missing_value(field), dtype=_dtype(field)).tobytes())
+            elif os.path.getsize(path) > size:
+                os.truncate(path, size)
+    
+    def _open_partition(self, name, fields):
+        """Memory-mapped columns of one partition, trimmed to the rows every column has"""
+        directory = os.path.join(self.root, name)
+        rows = self._complete_rows(directory)
+        if rows == 0:
+            return None, 0
+        
+        columns = {}
+        for field in set(fields) | {'timestamp'}:
+            path = os.path.join(directory, _file_name(field))
+            if os.path.exists(path):
+                columns[field] = np.memmap(path, dtype=_dtype(field), mode='r', shape=(rows,))
+            else:
+                columns[field] = np.full(rows, _missing_value(field), dtype=_dtype(field))
+        return columns, rows
+    
+    def latest_timestamp(self):
+        """Timestamp of the newest stored snapshot, or None"""
+        for name in reversed(self.partitions()):
+            columns, rows = self._open_partition(name, ('timestamp',))
+            if rows:
+                return float(columns['timestamp'][rows - 1])
+        return None
+    
+    def resolve_markets(self, market_ids):
+        """Dictionary indices for market keys (source, id) or bare ids (any source)"""
+        wanted = set()
+        for market_id in market_ids:
+            if isinstance(market_id, (tuple, list)):
+                index = self._keys.get(tuple(market_id))
+                if index is not None:
+                    wanted.add(index)
+            else:
+                wanted.update(index for (_, stored_id), index in self._keys.items() if stored_id == market_id)
+        return np.array(sorted(wanted), dtype=np.int32)
+    
+    def iter_range(self, start=None, end=None, fields=None, market_ids=None):
+        """
+        Yield one dict of columns per day partition for rows with start <= timestamp < end
+        Without market_ids the arrays are zero-copy views of the memory-mapped files
+        """
+        fields = tuple(fields or FLOAT_FIELDS + INT_FIELDS)
+        wanted = self.resolve_markets(market_ids) if market_ids is not None else None
+        
+        for name in self.partitions():
+            # Skip whole days outside the range by name before touching any file
+            if start is not None and name < self.partition_name(start):
+                continue
+            if end is not None and name > self.partition_name(end):
+                break
+            
+            columns, rows = self._open_partition(name, fields + (('market',) if wanted is not None else ()))
+            if not rows:
+                continue
+            
+            timestamps = columns['timestamp']
+            low = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+            high = rows if end is None else int(np.searchsorted(timestamps, end, side='left'))
+            if low >= high:
+                continue
+            
+            if wanted is None:
+                yield {field: columns[field][low:high] for field in fields}
+            else:
+                mask = np.isin(columns['market'][low:high], wanted)
+                if mask.any():
+                    yield {field: columns[field][low:high][mask] for field in fields}
+    
+    def read_range(self, start=None, end=None, fields=None, market_ids=None):
+        """Rows in a time range as one dict of arrays (concatenated across partitions)"""
+        fields = tuple(fields or FLOAT_FIELDS + INT_FIELDS)
+        parts = list(self.iter_range(start, end, fields, market_ids))
+        if not parts:
+            return {field: np.zeros(0, dtype=_dtype(field)) for field in fields}
+        if len(parts) == 1:
+            return parts[0]
+        return {field: np.concatenate([part[field] for part in parts]) for field in fields}
+    
+    def to_table(self, rows):
+        """Rebuild a MarketTable from stored rows (a read_range result with every field)"""
+        markets = [self._markets[index] for index in rows['market'].tolist()]
+        columns = {name: [market[name] for market in markets] for name in DICTIONARY_FIELDS}
+        columns['updated_at'] = [
+            datetime.fromtimestamp(timestamp, timezone.utc).isoformat() for timestamp in rows['timestamp'].tolist()
+        ]
+        for field in FLOAT_FIELDS[1:]:
+            columns[field] = np.array(rows[field])
+        columns['confidence'] = np.array(rows['confidence'])
+        for field, vocabulary in CODES.items():
+            columns[field] = [vocabulary[code] if code >= 0 else '' for code in rows[field].tolist()]
+        return MarketTable(columns)
+    
+    def latest_snapshot(self):
+        """(timestamp, MarketTable) of the newest stored snapshot, or None"""
+        timestamp = self.latest_timestamp()
+        if timestamp is None:
+            return None
+        return timestamp, self.to_table(self.read_range(timestamp, np.nextafter(timestamp, np.inf)))
+    
+    def iter_ticks(self, start=None, end=None, market_ids=None):
+        """
+        Stream (timestamp, markets) ticks in ReplayBacktester's format, one partition at a time
+        Each market carries its recorded ai_probability and signals; signals are None
+        for rows stored before every signal was recorded
+        """
+        fields = ('timestamp', 'market', 'market_prob', 'liquidity', 'volume', 'ai_probability') + SIGNAL_FIELDS
+        for part in self.iter_range(start, end, fields, market_ids):
+            timestamps = part['timestamp']
+            # Rows of one snapshot share a timestamp, so ticks are the runs between changes
+            boundaries = np.flatnonzero(np.diff(timestamps)) + 1
+            starts = np.concatenate([[0], boundaries])
+            ends = np.concatenate([boundaries, [len(timestamps)]])
+            for low, high in zip(starts.tolist(), ends.tolist()):
+                columns = {field: part[field][low:high].tolist() for field in fields[1:]}
+                markets = []
+                for k, index in enumerate(columns['market']):
+                    signals = {field: columns[field][k] for field in SIGNAL_FIELDS}
+                    markets.append({
+                        **self._markets[index],
+                        'market_prob': columns['market_prob'][k],
+                        'liquidity': columns['liquidity'][k],
+                        'volume': columns['volume'][k],
+                        'ai_probability': columns['ai_probability'][k],
+                        'signals': None if any(np.isnan(value) for value in signals.values()) else signals
+                    })
+                yield float(timestamps[low]), markets